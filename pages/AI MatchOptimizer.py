@@ -2,21 +2,56 @@ import os
 import json
 import pandas as pd
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from src.extract_entities import extract_entities
 from src.prompt_builder import build_prompt
-from src.llm_interface import generate_answer
+from src.llm_interface import stream_answer_cached
 
 st.set_page_config(page_title="AI MatchOptimizer", layout="wide")
 st.title("⚽ AI MatchOptimizer")
 st.markdown("Ask your tactical football question:")
 
+
+@st.cache_resource
+def get_prewarm_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="prompt-prewarm")
+
+
+def prompt_future(q: str):
+    """Background build of the prompt for q; only the latest question is kept per session"""
+    futures = st.session_state.setdefault("prompt_futures", {})
+    if q not in futures:
+        futures.clear()
+        futures[q] = get_prewarm_pool().submit(build_prompt, q)
+    return futures[q]
+
+
+def prewarm_prompt():
+    """Start building the prompt as soon as the question is committed (Enter or leaving the box)"""
+    q = st.session_state.get("query", "").strip()
+    if q:
+        prompt_future(q)
+
+
+def get_prompt(q: str):
+    """Prompt for q; waits for the pre-warm if it is still running. A failed build is retried next time"""
+    future = prompt_future(q)
+    try:
+        return future.result()
+    except Exception:
+        st.session_state["prompt_futures"].pop(q, None)
+        raise
+
+
 # User input
-query = st.text_input("🧠 Your question", placeholder="e.g., How can we beat Sanfrecce Hiroshima?")
-
-if query:
-    prompt, loaded_files = build_prompt(query)
-    if st.button("🧠 Generate Answer"):
-        with st.spinner("Thinking like a coach..."):
-            answer = generate_answer(prompt)
-        st.markdown("### 💬 Answer")
-        st.markdown(answer)
+query = st.text_input(
+    "🧠 Your question",
+    placeholder="e.g., How can we beat Sanfrecce Hiroshima?",
+    key="query",
+    on_change=prewarm_prompt,
+).strip()
+
+if st.button("🧠 Generate Answer", disabled=not query):
+    prompt, loaded_files = get_prompt(query)
+    st.markdown("### 💬 Answer")
+    answer = st.write_stream(stream_answer_cached(prompt, query, loaded_files))
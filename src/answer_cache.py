@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+from typing import Dict, Iterator, List, Optional
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "data/cache/answers.sqlite")
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so near-identical questions share a key"""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.casefold()).split())
+
+
+def make_key(model: str, system_prompt: str, context: str, question: str) -> str:
+    payload = json.dumps([model, system_prompt, context, normalize_question(question)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def files_fingerprint(paths: List[str]) -> List[list]:
+    """(path, mtime_ns, size) of every file the answer was built from"""
+    fingerprint = []
+    for path in sorted(set(paths)):
+        try:
+            st = os.stat(path)
+            fingerprint.append([path, st.st_mtime_ns, st.st_size])
+        except OSError:
+            fingerprint.append([path, None, None])
+    return fingerprint
+
+
+class AnswerCache:
+    """Persistent LLM answer cache in SQLite with TTL and source-file invalidation"""
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH, ttl: float = ANSWER_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, model TEXT, question TEXT, answer TEXT, "
+                "files TEXT, created_at REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _count(self, conn: sqlite3.Connection, name: str):
+        conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str, files: List[str]) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT answer, files, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(conn, "misses")
+                return None
+            answer, stored_files, created_at = row
+            if time.time() - created_at > self.ttl:
+                outcome = "expired"
+            elif json.loads(stored_files) != files_fingerprint(files):
+                outcome = "stale"
+            else:
+                conn.execute("UPDATE answers SET hits = hits + 1 WHERE key = ?", (key,))
+                self._count(conn, "hits")
+                return answer
+            conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._count(conn, outcome)
+            self._count(conn, "misses")
+            return None
+
+    def put(self, key: str, model: str, question: str, answer: str, files: List[str]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, model, question, answer, files, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, question, answer, json.dumps(files_fingerprint(files)), time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+
+    def stats(self) -> Dict[str, float]:
+        with self._connect() as conn:
+            stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            stats["entries"] = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = round(stats.get("hits", 0) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def stream(self, key: str, model: str, question: str, files: List[str], produce: Iterator[str]) -> Iterator[str]:
+        """Yield the cached answer, or pass `produce` through and store what it yielded.
+
+        Only a stream that runs to the end is stored: if `produce` raises (or
+        the consumer stops early) the partial answer is discarded.
+        """
+        cached = self.get(key, files)
+        if cached is not None:
+            print(f"⚡ Answer cache hit ({self.stats()['hit_rate']:.0%} hit rate)")
+            yield cached
+            return
+        parts = []
+        for token in produce:
+            parts.append(token)
+            yield token
+        answer = "".join(parts).strip()
+        if answer:
+            self.put(key, model, question, answer, files)
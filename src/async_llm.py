@@ -0,0 +1,211 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per call / per streamed chunk
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+# Point at any OpenAI-compatible endpoint, e.g. src/fake_llm_server.py
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+
+class LatencyStats:
+    """Latency and error counters for LLM calls"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.latencies: List[float] = []
+        self.first_token: List[float] = []
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool = True, first_token: Optional[float] = None):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+                return
+            self.latencies = (self.latencies + [seconds])[-self.window:]
+            if first_token is not None:
+                self.first_token = (self.first_token + [first_token])[-self.window:]
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @staticmethod
+    def _percentile(values: List[float], pct: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 3)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "p50_s": self._percentile(self.latencies, 50),
+                "p95_s": self._percentile(self.latencies, 95),
+                "first_token_p50_s": self._percentile(self.first_token, 50),
+            }
+
+
+def _retryable_errors() -> tuple:
+    errors = [asyncio.TimeoutError, ConnectionError]
+    try:
+        import openai
+        errors += [openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+class AsyncLLMClient:
+    """AsyncOpenAI-compatible chat client with one pooled HTTP connection pool,
+    bounded concurrency, per-call timeouts and exponential-backoff retries.
+    An optional rate_limiter (anything with an async wait()) is awaited before
+    every attempt, retries included.
+
+    Must be used from a single event loop; the HTTP client is created lazily
+    inside it.
+    """
+
+    def __init__(self, model: str, api_key: str, base_url: Optional[str] = LLM_BASE_URL,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE,
+                 rate_limiter=None):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.rate_limiter = rate_limiter
+        self.stats = LatencyStats()
+        self.retryable = _retryable_errors()
+        self._client = None
+        self._semaphore = None
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # retries are handled here, with backoff and stats
+                http_client=httpx.AsyncClient(limits=limits, timeout=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _backoff(self, attempt: int, error: Exception):
+        delay = self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+        print(f"🔁 LLM call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        self.stats.record_retry()
+        await asyncio.sleep(delay)
+
+    async def _throttle(self):
+        if self.rate_limiter is not None:
+            await self.rate_limiter.wait()
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int = 3000,
+                       temperature: float = 0.7) -> str:
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            await self._throttle()
+            try:
+                # The slot is held per attempt, not across the backoff sleep
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=self.model, messages=messages,
+                            max_tokens=max_tokens, temperature=temperature,
+                        ),
+                        self.timeout,
+                    )
+                self.stats.record(time.perf_counter() - start)
+                return response.choices[0].message.content
+            except self.retryable as e:
+                self.stats.record(time.perf_counter() - start, ok=False)
+                if attempt == self.max_retries:
+                    raise
+                await self._backoff(attempt, e)
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int = 3000,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield content deltas; retries only happen before the first token.
+
+        The HTTP response is closed as soon as the consumer stops iterating.
+        """
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            first_token = None
+            response = None
+            await self._throttle()
+            try:
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=self.model, messages=messages,
+                            max_tokens=max_tokens, temperature=temperature, stream=True,
+                        ),
+                        self.timeout,
+                    )
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if first_token is None:
+                                first_token = time.perf_counter() - start
+                            yield chunk.choices[0].delta.content
+                self.stats.record(time.perf_counter() - start, first_token=first_token)
+                return
+            except self.retryable as e:
+                self.stats.record(time.perf_counter() - start, ok=False)
+                if first_token is not None or attempt == self.max_retries:
+                    raise
+                error = e
+            finally:
+                if response is not None:
+                    await response.close()
+            await self._backoff(attempt, error)
+
+
+class BackgroundLoop:
+    """Event loop on a daemon thread so synchronous callers (Streamlit sessions)
+    share one AsyncLLMClient instead of each blocking on its own connection."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def iterate(self, agen: AsyncIterator) -> Iterator:
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), self.loop)
@@ -0,0 +1,165 @@
+# Batch LLM scouting briefs for a list of upcoming fixtures.
+# python -m src.batch_reports fixtures.csv --out data/reports/matchday_12
+# fixtures.csv needs home_team and away_team columns (fixture_id optional).
+import os
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import pandas as pd
+from typing import Dict, List, Optional
+
+from src.prompt_builder import DATA_DIR, QUESTION_MARKER, get_last_n_team_matches
+from src.context_packer import CONTEXT_TOKEN_BUDGET, pack_context
+from src.llm_interface import MODEL_NAME, SYSTEM_PROMPT, build_messages, get_api_key
+from src.async_llm import LLM_BASE_URL, AsyncLLMClient
+
+REPORTS_DIR = "data/reports"
+CHECKPOINT_FILE = "reports.jsonl"
+BRIEF_QUESTION = (
+    "Write a pre-match scouting brief for {home} vs {away}: each team's tactical identity, "
+    "strengths and weaknesses, key players, and how {home} can beat {away} and vice versa."
+)
+
+
+class RateLimiter:
+    """Spaces request starts so no more than `per_minute` begin in any minute"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def load_fixtures(path: str) -> List[Dict[str, str]]:
+    df = pd.read_csv(path)
+    fixtures = []
+    for row in df.to_dict("records"):
+        home, away = row["home_team"], row["away_team"]
+        fixture_id = row.get("fixture_id")
+        fixture_id = str(fixture_id) if pd.notna(fixture_id) else f"{home} vs {away}"
+        fixtures.append({"fixture_id": fixture_id, "home_team": home, "away_team": away})
+    return fixtures
+
+
+def build_fixture_prompts(fixtures: List[Dict[str, str]], n_matches: int = 3,
+                          token_budget: int = CONTEXT_TOKEN_BUDGET) -> List[Dict]:
+    """One prompt per fixture; each team's match history is loaded and rendered once"""
+    team_context: Dict[str, tuple] = {}
+    jobs = []
+    for fixture in fixtures:
+        sections, files = [], []
+        for team in (fixture["home_team"], fixture["away_team"]):
+            if team not in team_context:
+                summaries, stat_files = get_last_n_team_matches(team, n_matches)
+                team_context[team] = (
+                    [f"[{team} — {name}]\n{summary}" for name, summary in summaries],
+                    [os.path.join(DATA_DIR, name) for name, _ in summaries] + stat_files,
+                )
+            sections += team_context[team][0]
+            files += team_context[team][1]
+
+        question = BRIEF_QUESTION.format(home=fixture["home_team"], away=fixture["away_team"])
+        context = pack_context(sections, question, token_budget)
+        prompt = f"{SYSTEM_PROMPT}\n\nContext:\n{context}{QUESTION_MARKER}{question}"
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        jobs.append({**fixture, "prompt": prompt, "prompt_hash": prompt_hash, "files": files})
+    print(f"🧩 Built {len(jobs)} prompts from {len(team_context)} distinct team histories")
+    return jobs
+
+
+def load_checkpoint(path: str) -> Dict[tuple, Dict]:
+    """Completed reports keyed by (fixture_id, prompt_hash)"""
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    done[(record["fixture_id"], record["prompt_hash"])] = record
+    return done
+
+
+async def run_batch(jobs: List[Dict], out_dir: str, concurrency: int = 4, per_minute: float = 60,
+                    base_url: Optional[str] = LLM_BASE_URL, max_tokens: int = 1500) -> List[Dict]:
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, CHECKPOINT_FILE)
+    done = load_checkpoint(checkpoint_path)
+
+    # Identical prompts (same fixture listed twice) share one call
+    pending: Dict[str, List[Dict]] = {}
+    for job in jobs:
+        key = (job["fixture_id"], job["prompt_hash"])
+        if key not in done:
+            pending.setdefault(job["prompt_hash"], []).append(job)
+    print(f"▶️ {len(jobs) - sum(len(v) for v in pending.values())} fixtures already done, "
+          f"{len(pending)} LLM calls to make")
+
+    # The limiter is awaited per attempt, so retries count against --per-minute too
+    client = AsyncLLMClient(MODEL_NAME, get_api_key(), base_url=base_url, max_concurrency=concurrency,
+                            rate_limiter=RateLimiter(per_minute))
+    write_lock = asyncio.Lock()
+
+    async def run_one(group: List[Dict]):
+        job = group[0]
+        try:
+            answer = await client.complete(build_messages(job["prompt"]), max_tokens=max_tokens)
+        except Exception as e:
+            print(f"❌ {job['fixture_id']}: {e}")
+            return
+        async with write_lock:
+            with open(checkpoint_path, "a", encoding="utf-8") as f:
+                for g in group:
+                    record = {k: g[k] for k in ("fixture_id", "home_team", "away_team", "prompt_hash", "files")}
+                    record["report"] = answer.strip()
+                    done[(g["fixture_id"], g["prompt_hash"])] = record
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"✅ {job['fixture_id']}")
+
+    await asyncio.gather(*(run_one(group) for group in pending.values()))
+    print(f"📊 LLM stats: {client.stats.summary()}")
+    return [done[(j["fixture_id"], j["prompt_hash"])] for j in jobs if (j["fixture_id"], j["prompt_hash"]) in done]
+
+
+def write_markdown(reports: List[Dict], out_dir: str) -> str:
+    path = os.path.join(out_dir, "reports.md")
+    with open(path, "w", encoding="utf-8") as f:
+        for r in reports:
+            f.write(f"# {r['home_team']} vs {r['away_team']}\n\n{r['report']}\n\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate LLM scouting briefs for upcoming fixtures")
+    parser.add_argument("fixtures", help="CSV with home_team, away_team[, fixture_id]")
+    parser.add_argument("--out", default=os.path.join(REPORTS_DIR, "latest"))
+    parser.add_argument("--matches", type=int, default=3, help="past matches per team in the context")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=60, help="max LLM requests started per minute")
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="context tokens per prompt")
+    parser.add_argument("--base-url", default=LLM_BASE_URL, help="OpenAI-compatible endpoint")
+    parser.add_argument("--fake", action="store_true", help="run against an in-process fake LLM server")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if args.fake:
+        from src.fake_llm_server import start_fake_server
+        _, base_url = start_fake_server()
+        os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+    jobs = build_fixture_prompts(load_fixtures(args.fixtures), args.matches, args.budget)
+    reports = asyncio.run(run_batch(jobs, args.out, args.concurrency, args.rpm, base_url))
+    print(f"🏁 {len(reports)}/{len(jobs)} briefs ready → {write_markdown(reports, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,14 @@
 import os
 import pandas as pd
 from typing import List, Dict, Any, Optional
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from pathlib import Path
+from src.index_sync import sync_documents
+from src.embedding_pipeline import EMBEDDING_MODEL, column_records, format_rows, get_embeddings
 
 # Configuration
 FAISS_PATH = r"E:/Ai_com/data/faiss_index"
 PLAYER_CSV_PATH = r"E:\Ai_com\data\files1\J1 2024_players.csv"
 TEAM_CSV_PATH = r"E:\Ai_com\data\files1\J1_teams_with_match_id.csv"
-EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 # Expected columns for validation
 PLAYER_EXPECTED_COLUMNS = [
@@ -180,6 +178,96 @@ TEAM_EXPECTED_COLUMNS = [
     "Throw-Ins into the Box"
 ]
 
+# Document templates; {Column} placeholders are filled column-wise by format_rows
+PLAYER_PROFILE_TEMPLATE = """
+        Player Profile: {Full name}
+        Team: {Team}
+        Position: {Primary position}
+        Player ID: {Wyscout id}
+        Playing Style: {player_style}
+        Age: {Age}
+        Height: {Height} cm
+        Weight: {Weight} kg
+        Preferred Foot: {Foot}
+        Market Value: {Market value}
+
+        Season Statistics:
+        - Matches Played: {Matches played}
+        - Minutes Played: {Minutes played}
+        - Goals: {Goals} (xG: {xG})
+        - Assists: {Assists} (xA: {xA})
+        - Non-Penalty Goals: {Non-penalty goals}
+        - Shots: {Shots} ({Shots on target, %}% on target)
+        - Key Passes: {Key passes per 90} per 90
+        - Dribbles: {Dribbles per 90} per 90 ({Successful dribbles, %}% success)
+
+        Per 90 Metrics:
+        - Goals: {Goals per 90}
+        - xG: {xG per 90}
+        - Assists: {Assists per 90}
+        - xA: {xA per 90}
+        - Touches in Box: {Touches in box per 90}
+        - Progressive Runs: {Progressive runs per 90}
+
+        Defensive Actions:
+        - Defensive Duels: {Defensive duels per 90} ({Defensive duels won, %}% won)
+        - Aerial Duels: {Aerial duels per 90} ({Aerial duels won, %}% won)
+        - Interceptions: {Interceptions per 90}
+        - Tackles: {Sliding tackles per 90}
+
+        Passing Statistics:
+        - Pass Accuracy: {Accurate passes, %}%
+        - Progressive Passes: {Progressive passes per 90}
+        - Key Passes: {Key passes per 90}
+        - Passes to Final Third: {Passes to final third per 90}
+
+        Additional Attributes:
+        - Fouls Committed: {Fouls per 90} per 90
+        - Fouls Suffered: {Fouls suffered per 90} per 90
+        - Yellow Cards: {Yellow cards}
+        - Red Cards: {Red cards}
+        """
+
+TEAM_MATCH_TEMPLATE = """
+Match Report for {Team}
+Match ID: {match_id}
+Date: {Date}
+Match: {Match}
+
+Match Statistics:
+- Expected Goals (xG): {xG}
+- Expected Goals Against (xGA): {xGA}
+- xG Difference (xGD): {xGD}
+- Open Play xG: {Open Play xG}
+- Open Play xGA: {Open Play xGA}
+- Set Piece xG: {Set Piece xG}
+- Set Piece xGA: {Set Piece xGA}
+- Non-Penalty xG (npxG): {npxG}
+- Goals Scored: {Goals}
+- Goals Conceded: {Goals Conceded}
+- Goal Difference: {GD}
+- Possession: {Possession}%
+- Field Tilt: {Field Tilt}%
+- Passes in Opposition Half: {Passes in Opposition Half}
+- Passes into Box: {Passes into Box}
+- Shots Taken: {Shots}
+- Shots Faced: {Shots Faced}
+- Crosses: {Crosses}
+- Corners: {Corners}
+- Fouls Committed: {Fouls}
+- PPDA (Passes per Defensive Action): {PPDA}
+- High Recoveries: {High Recoveries}
+- Game Control: {Game Control}%
+- Expected Threat (xT): {xT}
+- xT Against: {xT Against}
+
+Advanced Metrics:
+- On-Ball Pressure: {On-Ball Pressure}
+- Off-Ball Pressure: {Off-Ball Pressure}
+- Throw-Ins into the Box: {Throw-Ins into the Box}
+- Average Pass Height: {Avg Pass Height}
+"""
+
 def validate_csv(df: pd.DataFrame, expected_columns: List[str], file_name: str) -> bool:
     """Validate if CSV has the expected columns"""
     missing_cols = [col for col in expected_columns if col not in df.columns]
@@ -212,159 +300,38 @@ def load_csv_data() -> tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
 
 def create_player_documents(player_df: pd.DataFrame) -> List[Document]:
     """Create Document objects from player data"""
-    documents = []
-    
-    for _, row in player_df.iterrows():
-        # Create human-readable content for embedding
-        content = f"""
-        Player Profile: {row['Full name']}
-        Team: {row['Team']}
-        Position: {row['Primary position']}
-        Player ID: {row['Wyscout id']}
-        Playing Style: {row['player_style']}
-        Age: {row.get('Age', 'N/A')}
-        Height: {row.get('Height', 'N/A')} cm
-        Weight: {row.get('Weight', 'N/A')} kg
-        Preferred Foot: {row.get('Foot', 'N/A')}
-        Market Value: {row.get('Market value', 'N/A')}
-
-        Season Statistics:
-        - Matches Played: {row.get('Matches played', 'N/A')}
-        - Minutes Played: {row.get('Minutes played', 'N/A')}
-        - Goals: {row.get('Goals', 'N/A')} (xG: {row.get('xG', 'N/A')})
-        - Assists: {row.get('Assists', 'N/A')} (xA: {row.get('xA', 'N/A')})
-        - Non-Penalty Goals: {row.get('Non-penalty goals', 'N/A')}
-        - Shots: {row.get('Shots', 'N/A')} ({row.get('Shots on target, %', 'N/A')}% on target)
-        - Key Passes: {row.get('Key passes per 90', 'N/A')} per 90
-        - Dribbles: {row.get('Dribbles per 90', 'N/A')} per 90 ({row.get('Successful dribbles, %', 'N/A')}% success)
-
-        Per 90 Metrics:
-        - Goals: {row.get('Goals per 90', 'N/A')}
-        - xG: {row.get('xG per 90', 'N/A')}
-        - Assists: {row.get('Assists per 90', 'N/A')}
-        - xA: {row.get('xA per 90', 'N/A')}
-        - Touches in Box: {row.get('Touches in box per 90', 'N/A')}
-        - Progressive Runs: {row.get('Progressive runs per 90', 'N/A')}
-
-        Defensive Actions:
-        - Defensive Duels: {row.get('Defensive duels per 90', 'N/A')} ({row.get('Defensive duels won, %', 'N/A')}% won)
-        - Aerial Duels: {row.get('Aerial duels per 90', 'N/A')} ({row.get('Aerial duels won, %', 'N/A')}% won)
-        - Interceptions: {row.get('Interceptions per 90', 'N/A')}
-        - Tackles: {row.get('Sliding tackles per 90', 'N/A')}
+    contents = format_rows(player_df, PLAYER_PROFILE_TEMPLATE)
+    # Structured metadata for filtering
+    metadatas = column_records(
+        player_df,
+        {"player_name": "Full name", "player_id": "Wyscout id", "team_name": "Team",
+         "position": "Primary position", "style": "player_style"},
+        type="player_profile", source_file=PLAYER_CSV_PATH,
+    )
+    documents = [Document(page_content=c, metadata=m) for c, m in zip(contents, metadatas)]
 
-        Passing Statistics:
-        - Pass Accuracy: {row.get('Accurate passes, %', 'N/A')}%
-        - Progressive Passes: {row.get('Progressive passes per 90', 'N/A')}
-        - Key Passes: {row.get('Key passes per 90', 'N/A')}
-        - Passes to Final Third: {row.get('Passes to final third per 90', 'N/A')}
-
-        Additional Attributes:
-        - Fouls Committed: {row.get('Fouls per 90', 'N/A')} per 90
-        - Fouls Suffered: {row.get('Fouls suffered per 90', 'N/A')} per 90
-        - Yellow Cards: {row.get('Yellow cards', 'N/A')}
-        - Red Cards: {row.get('Red cards', 'N/A')}
-        """
-        # Create structured metadata for filtering
-        metadata = {
-            "type": "player_profile",
-            "player_name": row['Full name'],
-            "player_id": str(row['Wyscout id']),
-            "team_name": row['Team'],
-            "position": row['Primary position'],
-            "style": row['player_style'],
-            "source_file": PLAYER_CSV_PATH
-        }
-        
-        documents.append(Document(page_content=content, metadata=metadata))
-    
     print(f"Created {len(documents)} player profile documents")
     return documents
 
 def create_team_match_documents(team_df: pd.DataFrame) -> List[Document]:
     """Create Document objects from team match data"""
-    documents = []
-    
-    for _, row in team_df.iterrows():
-        # Create human-readable content for embedding
-        content = f"""
-Match Report for {row['Team']}
-Match ID: {row['match_id']}
-Date: {row['Date']}
-Match: {row['Match']}
+    contents = format_rows(team_df, TEAM_MATCH_TEMPLATE)
+    # Structured metadata for filtering
+    metadatas = column_records(
+        team_df,
+        {"team_name": "Team", "match_id": "match_id", "date": "Date", "match": "Match"},
+        type="team_match_stat", source_file=TEAM_CSV_PATH,
+    )
+    documents = [Document(page_content=c, metadata=m) for c, m in zip(contents, metadatas)]
 
-Match Statistics:
-- Expected Goals (xG): {row.get('xG', 'N/A')}
-- Expected Goals Against (xGA): {row.get('xGA', 'N/A')}
-- xG Difference (xGD): {row.get('xGD', 'N/A')}
-- Open Play xG: {row.get('Open Play xG', 'N/A')}
-- Open Play xGA: {row.get('Open Play xGA', 'N/A')}
-- Set Piece xG: {row.get('Set Piece xG', 'N/A')}
-- Set Piece xGA: {row.get('Set Piece xGA', 'N/A')}
-- Non-Penalty xG (npxG): {row.get('npxG', 'N/A')}
-- Goals Scored: {row.get('Goals', 'N/A')}
-- Goals Conceded: {row.get('Goals Conceded', 'N/A')}
-- Goal Difference: {row.get('GD', 'N/A')}
-- Possession: {row.get('Possession', 'N/A')}%
-- Field Tilt: {row.get('Field Tilt', 'N/A')}%
-- Passes in Opposition Half: {row.get('Passes in Opposition Half', 'N/A')}
-- Passes into Box: {row.get('Passes into Box', 'N/A')}
-- Shots Taken: {row.get('Shots', 'N/A')}
-- Shots Faced: {row.get('Shots Faced', 'N/A')}
-- Crosses: {row.get('Crosses', 'N/A')}
-- Corners: {row.get('Corners', 'N/A')}
-- Fouls Committed: {row.get('Fouls', 'N/A')}
-- PPDA (Passes per Defensive Action): {row.get('PPDA', 'N/A')}
-- High Recoveries: {row.get('High Recoveries', 'N/A')}
-- Game Control: {row.get('Game Control', 'N/A')}%
-- Expected Threat (xT): {row.get('xT', 'N/A')}
-- xT Against: {row.get('xT Against', 'N/A')}
-
-Advanced Metrics:
-- On-Ball Pressure: {row.get('On-Ball Pressure', 'N/A')}
-- Off-Ball Pressure: {row.get('Off-Ball Pressure', 'N/A')}
-- Throw-Ins into the Box: {row.get('Throw-Ins into the Box', 'N/A')}
-- Average Pass Height: {row.get('Avg Pass Height', 'N/A')}
-"""
-        # Create structured metadata for filtering
-        metadata = {
-            "type": "team_match_stat",
-            "team_name": row['Team'],
-            "match_id": str(row['match_id']),
-            "date": row['Date'],
-            "match": row['Match'], 
-            "source_file": TEAM_CSV_PATH
-        }
-        
-        documents.append(Document(page_content=content, metadata=metadata))
-    
     print(f"Created {len(documents)} team match documents")
     return documents
 
 def store_documents_in_faiss(documents: List[Document], index_dir: str):
-    """Store or merge documents into FAISS index"""
+    """Upsert documents into the FAISS index; only new or changed ones are embedded"""
     try:
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-        os.makedirs(index_dir, exist_ok=True)
-
-        faiss_index_file = Path(index_dir) / "index.faiss"
-        if faiss_index_file.exists():
-            print("🌀 Existing FAISS index found, loading and merging...")
-            vectorstore = FAISS.load_local(
-                folder_path=index_dir,
-                embeddings=embeddings,
-                allow_dangerous_deserialization=True
-            )
-            vectorstore.add_documents(documents)
-        else:
-            print("🆕 Creating new FAISS index...")
-            vectorstore = FAISS.from_documents(
-                documents=documents,
-                embedding=embeddings
-            )
-
-        vectorstore.save_local(index_dir)
-        print(f"✅ FAISS index saved/merged at {index_dir}")
-        return vectorstore
+        embeddings = get_embeddings(EMBEDDING_MODEL)
+        return sync_documents(documents, index_dir, embeddings)
 
     except Exception as e:
         print(f"❌ Error saving to FAISS: {e}")
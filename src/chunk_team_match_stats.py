@@ -1,41 +1,38 @@
 import pandas as pd
-import uuid
 from chromadb import Client
-from langchain_community.vectorstores import Chroma
-from langchain.schema import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.embedding_pipeline import get_embeddings
 
 # Load the team match data CSV
 df = pd.read_csv("E:/Ai_com/data/files1/J1_teams_with_match_id.csv")
 df = df.fillna("N/A").astype(str)
 
+# Chroma rejects add() calls above its max batch size
+CHROMA_ADD_BATCH = 5000
+
 # Initialize Chroma client
 chroma_client = Client()
-embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-# Prepare chunks
-team_chunks = []
+embedding = get_embeddings("sentence-transformers/all-MiniLM-L6-v2")
 
-for _, row in df.iterrows():
-    team = row["Team"]
-    match_id = row["match_id"]
-    match = row.get("Match", "Unknown Match")
-    date = row.get("Date", "Unknown Date")
-    opponent = "N/A"  # Optional enhancement: parse this from `Match` if it's like "Team A vs Team B"
+# Prepare chunks column-wise
+meta_cols = ["Team", "Match", "Date", "match_id"]
+stat_cols = [c for c in df.columns if c not in meta_cols]
+teams = df["Team"].tolist()
+match_ids = df["match_id"].tolist()
+matches = df["Match"].tolist() if "Match" in df.columns else ["Unknown Match"] * len(df)
+dates = df["Date"].tolist() if "Date" in df.columns else ["Unknown Date"] * len(df)
+stats = df[stat_cols].to_dict("records")
 
-    # Drop metadata columns for clean stats
-    stats = row.drop(["Team", "Match", "Date", "match_id"], errors="ignore").to_dict()
-
-    text = f"""
-    Match Performance Summary:
+texts = [
+    f"""Match Performance Summary:
     - Team: {team}
     - Match ID: {match_id}
     - Match: {match}
     - Date: {date}
-    - Stats: {stats}
-    """
-
-    metadata = {
+    - Stats: {row_stats}"""
+    for team, match_id, match, date, row_stats in zip(teams, match_ids, matches, dates, stats)
+]
+metadatas = [
+    {
         "team_name": team,
         "match_id": match_id,
         "match_name": match,
@@ -43,20 +40,29 @@ for _, row in df.iterrows():
         "type": "team_match_stat",
         "source_file": "J1_teams_with_match_id.csv"
     }
+    for team, match_id, match, date in zip(teams, match_ids, matches, dates)
+]
+ids = [f"{team}_{match_id}" for team, match_id in zip(teams, match_ids)]
 
-    team_chunks.append({
-        "id": f"{team}_{match_id}",
-        "text": text.strip(),
-        "metadata": metadata
-    })
+# Rows without a match_id share an id; like the old one-by-one add, the first one wins
+first_row = {}
+for i, chunk_id in enumerate(ids):
+    first_row.setdefault(chunk_id, i)
+keep = sorted(first_row.values())
+texts = [texts[i] for i in keep]
+metadatas = [metadatas[i] for i in keep]
+ids = [ids[i] for i in keep]
 
-# Save chunks to Chroma
+# Embed in large batches and bulk-insert into Chroma
 collection = chroma_client.get_or_create_collection("ai_matchoptimizer")
-for chunk in team_chunks:
-    collection.add(
-        documents=[chunk["text"]],
-        metadatas=[chunk["metadata"]],
-        ids=[chunk["id"]]
+vectors = embedding.embed(texts)
+for start in range(0, len(texts), CHROMA_ADD_BATCH):
+    end = start + CHROMA_ADD_BATCH
+    collection.upsert(
+        documents=texts[start:end],
+        metadatas=metadatas[start:end],
+        embeddings=vectors[start:end].tolist(),
+        ids=ids[start:end]
     )
 
-print("✅ Team match stats from J1_teams_with_match_id.csv successfully chunked and stored.")
+print(f"✅ {len(texts)} team match stats from J1_teams_with_match_id.csv successfully chunked and stored.")
@@ -5,15 +5,15 @@ import pandas as pd
 import re
 from typing import List, Dict
 from langchain.schema import Document
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
+from src.index_sync import sync_documents
+from src.embedding_pipeline import get_embeddings
 
 # Paths
 DATA_FOLDER = "E:/Ai_com/data/files1"
 FAISS_DIR = "E:/Ai_com/data/faiss_index"
 
 # Embeddings
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+embeddings = get_embeddings("sentence-transformers/all-MiniLM-L6-v2")
 
 def parse_filename(filename: str) -> Dict[str, str]:
     metadata = {}
@@ -51,14 +51,16 @@ def process_csv_stats(file_path: str, name_col: str, stat_type: str) -> List[Doc
     docs = []
     try:
         df = pd.read_csv(file_path)
-        for _, row in df.iterrows():
-            if name_col not in row or pd.isna(row[name_col]):
-                continue
-            name = row[name_col]
-            stats = {k: v for k, v in row.items() if k != name_col and not pd.isna(v)}
-            content = f"{stat_type.title()} Stats for {name}:\n" + "\n".join(f"{k}: {v}" for k, v in stats.items())
-            meta = parse_filename(os.path.basename(file_path)) | {'type': stat_type, name_col.lower(): name}
-            docs.append(Document(page_content=content, metadata=meta))
+        if name_col not in df.columns:
+            return docs
+        df = df[df[name_col].notna()]
+        base_meta = parse_filename(os.path.basename(file_path)) | {'type': stat_type}
+        header = f"{stat_type.title()} Stats for "
+        for record in df.to_dict("records"):
+            name = record.pop(name_col)
+            stats = "\n".join(f"{k}: {v}" for k, v in record.items() if not pd.isna(v))
+            docs.append(Document(page_content=f"{header}{name}:\n{stats}",
+                                 metadata=base_meta | {name_col.lower(): name}))
     except Exception as e:
         print(f"Failed to process {file_path}: {e}")
     return docs
@@ -85,10 +87,9 @@ def main():
     if not documents:
         print("No documents created.")
         return
-    print("Saving to FAISS index...")
-    db = FAISS.from_documents(documents, embeddings)
-    db.save_local(FAISS_DIR)
-    print("✅ FAISS index created and saved.")
+    print("Syncing FAISS index...")
+    if sync_documents(documents, FAISS_DIR, embeddings) is not None:
+        print("✅ FAISS index up to date.")
 
 if __name__ == "__main__":
     main()
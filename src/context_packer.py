@@ -0,0 +1,126 @@
+import os
+import re
+import json
+from typing import List
+
+# Max tokens of context sent to the LLM per question
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o family
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+except Exception as e:
+    print(f"⚠️ tiktoken unavailable ({e}), using approximate token counts")
+    _encoding = None
+
+_APPROX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "to", "for", "with", "against", "vs",
+    "how", "what", "why", "did", "do", "does", "can", "we", "they", "is", "are", "was", "were",
+    "their", "our", "last", "match", "matches", "team", "play", "played",
+}
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Words and punctuation marks are roughly one token each
+    return len(_APPROX_TOKEN_RE.findall(text))
+
+
+def query_terms(query: str) -> set:
+    return {w for w in _WORD_RE.findall(query.lower()) if w not in STOPWORDS and len(w) > 1}
+
+
+def compact_text(text: str) -> str:
+    """Fold a block that is JSON onto one line; otherwise only drop blank lines and trailing spaces.
+
+    Leading whitespace and line breaks of tables and prose are kept so
+    df.to_string() and CSV rows stay aligned.
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        try:
+            return compact_json(json.loads(stripped))
+        except ValueError:
+            pass
+    lines = [line.rstrip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line.strip())
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Leading lines of text that fit in budget tokens ("" if not even the first line fits)"""
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        tokens = count_tokens(line + "\n")
+        if used + tokens > budget:
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept)
+
+
+def compact_json(data) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def split_blocks(text: str) -> List[str]:
+    return [b for b in re.split(r"\n\s*\n", text) if b.strip()]
+
+
+def pack_context(sections: List[str], query: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Fill up to token_budget with the blocks most relevant to the query.
+
+    Sections are split into blocks at blank lines. Each section's leading block
+    (its header) is tried first; the remaining blocks are ranked by how many
+    query terms they mention, with earlier blocks winning ties. A block that
+    does not fit is cut to the remaining budget. Selected blocks are emitted
+    in their original order.
+    """
+    terms = query_terms(query)
+    candidates = []
+    previous = None
+    for s_idx, text in enumerate(sections):
+        for b_idx, block in enumerate(split_blocks(text)):
+            block = compact_text(block)
+            # Back-to-back repeats (e.g. the same file loaded twice) carry nothing new
+            if not block or block == previous:
+                continue
+            previous = block
+            lowered = block.lower()
+            score = sum(1 for t in terms if t in lowered)
+            candidates.append({
+                "order": (s_idx, b_idx),
+                "rank": (b_idx != 0, -score, b_idx, s_idx),
+                "text": block,
+                "tokens": count_tokens(block),
+            })
+
+    used = 0
+    selected = []
+    truncated = 0
+    for c in sorted(candidates, key=lambda c: c["rank"]):
+        if used + c["tokens"] > token_budget:
+            text = truncate_to_tokens(c["text"], token_budget - used)
+            if not text:
+                continue
+            c = dict(c, text=text, tokens=count_tokens(text))
+            truncated += 1
+        selected.append(c)
+        used += c["tokens"]
+
+    dropped = len(candidates) - len(selected)
+    print(f"📦 Packed context: {used}/{token_budget} tokens, {len(selected)} blocks kept "
+          f"({truncated} truncated), {dropped} dropped")
+
+    parts = []
+    last_section = None
+    for c in sorted(selected, key=lambda c: c["order"]):
+        sep = "\n" if c["order"][0] == last_section else "\n\n"
+        parts.append((sep if parts else "") + c["text"])
+        last_section = c["order"][0]
+    return "".join(parts)
@@ -0,0 +1,177 @@
+# SQLite document store for the FAISS index, replacing LangChain's index.pkl.
+# Row r of the table is vector r of index.faiss, so a search hit is one
+# primary-key lookup and nothing else has to be loaded.
+import os
+import re
+import json
+import pickle
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.context_packer import STOPWORDS
+
+DOCSTORE_FILE = "docstore.sqlite"
+# BM25 inverted index over page_content, kept in the same database
+FTS_TABLE = "docs_fts"
+FTS_META_WEIGHT = 2.0
+METADATA_UNINDEXED = {"source_file"}
+LEGACY_PICKLE = "index.pkl"
+# Bytes of the database SQLite may memory-map for reads
+DOCSTORE_MMAP_SIZE = int(os.getenv("DOCSTORE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+class StoredDocument:
+    __slots__ = ("doc_id", "page_content", "metadata")
+
+    def __init__(self, doc_id: str, page_content: str, metadata: Dict):
+        self.doc_id = doc_id
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+def write_doc_store(path: str, rows: Iterable[Tuple[str, str, Dict]]):
+    """Write (doc_id, page_content, metadata) rows in FAISS order, atomically"""
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    with conn:
+        conn.execute(
+            "CREATE TABLE docs (row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, "
+            "metadata TEXT NOT NULL, page_content TEXT NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?, ?)",
+            ((row, doc_id, json.dumps(metadata, ensure_ascii=False, default=str), content)
+             for row, (doc_id, content, metadata) in enumerate(rows)),
+        )
+        build_fts(conn)
+    conn.close()
+    os.replace(tmp, path)
+
+
+def metadata_text(metadata: Dict) -> str:
+    """Searchable form of a chunk's metadata (names, match id, type, role)"""
+    return " ".join(str(v).replace("_", " ") for k, v in metadata.items() if k not in METADATA_UNINDEXED)
+
+
+def build_fts(conn: sqlite3.Connection):
+    """(Re)build the FTS5 index that backs BM25 search.
+
+    Contentless: it only stores postings. Metadata is indexed alongside the
+    text because stat chunks often omit the team, player or match they
+    describe.
+    """
+    conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    conn.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(page_content, meta, content='', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    conn.executemany(
+        f"INSERT INTO {FTS_TABLE}(rowid, page_content, meta) VALUES (?, ?, ?)",
+        ((row, content, metadata_text(json.loads(metadata)))
+         for row, metadata, content in conn.execute("SELECT row, metadata, page_content FROM docs").fetchall()),
+    )
+
+
+def ensure_fts(path: str):
+    """Add the BM25 index to a store written before it existed"""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone()
+            if not exists:
+                build_fts(conn)
+                print(f"🔎 Built BM25 index for {path}")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ BM25 index unavailable for {path}: {e}")
+    finally:
+        conn.close()
+
+
+def fts_query(query: str) -> str:
+    """OR of the query's quoted terms, so FTS5 syntax in questions can't break it"""
+    terms = dict.fromkeys(t for t in re.findall(r"\w+", query.lower()) if t not in STOPWORDS)
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def migrate_pickle(index_dir: str) -> bool:
+    """Convert a LangChain index.pkl next to index.faiss into docstore.sqlite"""
+    pickle_path = os.path.join(index_dir, LEGACY_PICKLE)
+    if not os.path.exists(pickle_path):
+        return False
+    # Our own file from the chunk builders; this is the last time it is unpickled
+    with open(pickle_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    rows = []
+    for row in range(len(index_to_docstore_id)):
+        doc_id = index_to_docstore_id[row]
+        doc = docstore.search(doc_id)
+        rows.append((doc_id, doc.page_content, doc.metadata))
+    write_doc_store(os.path.join(index_dir, DOCSTORE_FILE), rows)
+    print(f"📦 Migrated {len(rows)} documents from {LEGACY_PICKLE} to {DOCSTORE_FILE}")
+    return True
+
+
+class DocStore:
+    """Read-only, memory-mapped view of docstore.sqlite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {DOCSTORE_MMAP_SIZE}")
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def metadatas(self) -> List[Dict]:
+        """Metadata of every row (no page content), in FAISS order"""
+        return [json.loads(m) for (m,) in self.conn.execute("SELECT metadata FROM docs ORDER BY row")]
+
+    def get(self, rows: List[int]) -> List[StoredDocument]:
+        """Documents for FAISS rows, in the order given"""
+        if not rows:
+            return []
+        placeholders = ",".join("?" * len(rows))
+        found = {
+            row: StoredDocument(doc_id, content, json.loads(metadata))
+            for row, doc_id, metadata, content in self.conn.execute(
+                f"SELECT row, doc_id, metadata, page_content FROM docs WHERE row IN ({placeholders})",
+                [int(r) for r in rows],
+            )
+        }
+        return [found[int(r)] for r in rows if int(r) in found]
+
+    def search_text(self, query: str, limit: int, rows: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """BM25 top rows for the query, optionally restricted to rows (lower score is better)"""
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = (f"SELECT rowid, bm25({FTS_TABLE}, 1.0, {FTS_META_WEIGHT}) AS score FROM {FTS_TABLE} "
+               f"WHERE {FTS_TABLE} MATCH ?")
+        params: list = [match]
+        if rows is not None:
+            sql += " AND rowid IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(r) for r in rows]))
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        try:
+            return [(row, score) for row, score in self.conn.execute(sql, params)]
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ BM25 search failed: {e}")
+            return []
+
+    def all(self) -> List[StoredDocument]:
+        return [
+            StoredDocument(doc_id, content, json.loads(metadata))
+            for doc_id, metadata, content in self.conn.execute(
+                "SELECT doc_id, metadata, page_content FROM docs ORDER BY row")
+        ]
+
+
+def open_doc_store(index_dir: str) -> Optional[DocStore]:
+    """DocStore for an index directory, migrating a legacy pickle on first use"""
+    path = os.path.join(index_dir, DOCSTORE_FILE)
+    if not os.path.exists(path) and not migrate_pickle(index_dir):
+        return None
+    ensure_fts(path)
+    return DocStore(path)
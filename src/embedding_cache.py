@@ -0,0 +1,114 @@
+# Persistent embedding cache: one append-only float32 matrix per encoder
+# (model plus backend / ONNX export), memory-mapped for reads, plus a
+# text-hash -> row index.
+# data/cache/embeddings/<model>@<variant>/{vectors.f32, keys.txt, meta.json}
+import os
+import re
+import json
+import hashlib
+import threading
+import numpy as np
+from typing import Callable, Dict, List
+
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "data/cache/embeddings")
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Vectors are appended before their keys; whatever a crash mid-write
+    leaves unpaired is dropped on the next load or append."""
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR, variant: str = ""):
+        # Different backends / quantized exports give different vectors, so each gets its own matrix
+        name = f"{model_name}@{variant}" if variant else model_name
+        self.dir = os.path.join(cache_dir, re.sub(r"[^\w.@-]+", "_", name))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.keys_path = os.path.join(self.dir, "keys.txt")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.rows: Dict[str, int] = {}
+        self.n_rows = 0
+        self.dim = None
+        self._matrix = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, encoding="utf-8") as f:
+            self.dim = json.load(f)["dim"]
+        n_vectors = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        keys = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, encoding="utf-8") as f:
+                keys = [line.strip() for line in f]
+        if len(keys) > n_vectors:
+            keys = keys[:n_vectors]
+            with open(self.keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(key + "\n" for key in keys))
+        self.rows = {key: row for row, key in enumerate(keys)}
+        self.n_rows = len(keys)
+        self._remap()
+
+    def _remap(self):
+        n = self.n_rows
+        self._matrix = np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(n, self.dim)) if n else None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        os.makedirs(self.dir, exist_ok=True)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim}, f)
+            # Start clean so rows line up with keys
+            open(self.vectors_path, "wb").close()
+            open(self.keys_path, "w").close()
+        start = self.n_rows
+        with open(self.vectors_path, "r+b") as f:
+            f.seek(start * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype="float32").tobytes())
+            f.truncate()
+        with open(self.keys_path, "a", encoding="utf-8") as f:
+            f.write("".join(key + "\n" for key in keys))
+        for offset, key in enumerate(keys):
+            self.rows[key] = start + offset
+        self.n_rows += len(keys)
+        self._remap()
+
+    def get_many(self, texts: List[str], compute: Callable[[List[str]], np.ndarray], store: bool = True) -> np.ndarray:
+        """Embeddings for texts; only texts never seen before are passed to compute.
+
+        store=False looks cached vectors up without persisting the new ones
+        (one-off texts such as search queries).
+        """
+        keys = [text_key(t) for t in texts]
+        with self._lock:
+            missing: Dict[str, int] = {}
+            for i, key in enumerate(keys):
+                if key not in self.rows and key not in missing:
+                    missing[key] = i
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            if not keys:
+                return np.empty((0, self.dim or 0), "float32")
+            fresh = None
+            if missing:
+                fresh = np.asarray(compute([texts[i] for i in missing.values()]), dtype="float32")
+                if store:
+                    self._append(list(missing), fresh)
+                    fresh = None
+            if fresh is None:
+                return np.array(self._matrix[[self.rows[key] for key in keys]])
+            fresh_rows = {key: row for row, key in enumerate(missing)}
+            out = np.empty((len(keys), fresh.shape[1]), "float32")
+            for i, key in enumerate(keys):
+                out[i] = fresh[fresh_rows[key]] if key in fresh_rows else self._matrix[self.rows[key]]
+            return out
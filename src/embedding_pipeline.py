@@ -0,0 +1,151 @@
+# Embedding stage shared by the chunk builders.
+# Documents are formatted column-wise from DataFrames and embedded in large
+# CPU batches with sentence-transformers (optionally a multi-process pool or
+# an ONNX / quantized MiniLM export).
+import os
+import time
+import string
+import numpy as np
+from collections import OrderedDict
+import pandas as pd
+from typing import Dict, List, Optional
+from src.embedding_cache import EmbeddingCache
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:  # only needed when handing the embeddings to a LangChain store
+    Embeddings = object
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+# > 1 starts a sentence-transformers multi-process pool for large corpora
+EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "1"))
+# "torch" or "onnx"; EMBED_ONNX_FILE picks a quantized export, e.g. onnx/model_qint8_avx512.onnx
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE") or None
+# Reuse vectors of previously embedded texts (data/cache/embeddings)
+EMBED_CACHE = os.getenv("EMBED_CACHE", "1") == "1"
+# Recent query vectors kept in memory; queries are never written to the disk cache
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+# Below this many texts a process pool costs more than it saves
+MIN_POOL_TEXTS = 2000
+
+
+def format_rows(df: pd.DataFrame, template: str) -> List[str]:
+    """Fill `{Column name}` placeholders for every row at once.
+
+    Values render like str() on the cell (NaN -> "nan"); missing columns
+    render as "N/A".
+    """
+    result = pd.Series("", index=df.index, dtype=object)
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            result = result + literal
+        if field is not None:
+            values = df[field].astype(object).map(str) if field in df.columns else "N/A"
+            result = result + values
+    return result.tolist()
+
+
+def column_records(df: pd.DataFrame, columns: Dict[str, str], **constants) -> List[Dict[str, str]]:
+    """Metadata dicts built column-wise: {metadata key: column name} plus constants"""
+    data = {key: df[col].astype(object).map(str).tolist() for key, col in columns.items()}
+    return [
+        {**constants, **{key: data[key][i] for key in columns}} for i in range(len(df))
+    ]
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """LangChain-compatible embeddings with explicit batching and pooling.
+
+    Produces the same vectors as HuggingFaceEmbeddings for the same model
+    (no normalization), so existing indexes stay compatible.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBED_BATCH_SIZE,
+                 processes: int = EMBED_PROCESSES, backend: str = EMBED_BACKEND,
+                 onnx_file: Optional[str] = EMBED_ONNX_FILE, cache: Optional[EmbeddingCache] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.processes = processes
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.cache = cache
+        self._queries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._model = None
+        self._load_error: Optional[Exception] = None
+
+    @property
+    def variant(self) -> str:
+        """Encoder configuration that changes the vectors: backend and ONNX export"""
+        return f"{self.backend}-{self.onnx_file}" if self.onnx_file else self.backend
+
+    @property
+    def model(self):
+        # A failed load (e.g. offline, model not downloaded) is remembered so
+        # later calls fail fast instead of retrying the download every time
+        if self._load_error is not None:
+            raise RuntimeError(f"{self.model_name} unavailable: {self._load_error}")
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            kwargs = {"device": "cpu"}
+            if self.backend == "onnx":
+                kwargs["backend"] = "onnx"
+                if self.onnx_file:
+                    kwargs["model_kwargs"] = {"file_name": self.onnx_file}
+            try:
+                self._model = SentenceTransformer(self.model_name, **kwargs)
+            except Exception as e:
+                self._load_error = e
+                raise
+            print(f"🧠 Loaded {self.model_name} ({self.backend})")
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+        start = time.perf_counter()
+        if self.processes > 1 and len(texts) >= MIN_POOL_TEXTS:
+            pool = self.model.start_multi_process_pool(["cpu"] * self.processes)
+            try:
+                vectors = self.model.encode_multi_process(texts, pool, batch_size=self.batch_size)
+            finally:
+                self.model.stop_multi_process_pool(pool)
+        else:
+            vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        elapsed = time.perf_counter() - start
+        if len(texts) > 1:
+            print(f"⚡ Embedded {len(texts)} texts in {elapsed:.1f}s ({len(texts) / max(elapsed, 1e-9):.0f}/s)")
+        return np.asarray(vectors, dtype="float32")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """encode() behind the embedding cache, when one is attached"""
+        if self.cache is None:
+            return self.encode(texts)
+        vectors = self.cache.get_many(texts, self.encode)
+        if len(texts) > 1:
+            print(f"💾 Embedding cache: {self.cache.hits} hits, {self.cache.misses} misses, {len(self.cache)} stored")
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        if text in self._queries:
+            self._queries.move_to_end(text)
+            return self._queries[text]
+        if self.cache is None:
+            vector = self.encode([text])[0].tolist()
+        else:
+            vector = self.cache.get_many([text], self.encode, store=False)[0].tolist()
+        self._queries[text] = vector
+        if len(self._queries) > QUERY_CACHE_SIZE:
+            self._queries.popitem(last=False)
+        return vector
+
+
+def get_embeddings(model_name: str = EMBEDDING_MODEL, cache: bool = EMBED_CACHE) -> SentenceTransformerEmbeddings:
+    embeddings = SentenceTransformerEmbeddings(model_name)
+    if cache:
+        embeddings.cache = EmbeddingCache(model_name, variant=embeddings.variant)
+    return embeddings
@@ -0,0 +1,201 @@
+# Expected threat (xT) fitted from the event store.
+# The pitch is cut into an L x W grid; each cell's value is the chance that
+# possession there ends in a goal within the next few actions, solved by
+# value iteration over pass/carry transitions and shot outcomes.
+# python -m src.expected_threat [--refit] [--team "Urawa Reds"]
+import os
+import glob
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+from src.pass_graph import EVENT_DATA_DIR
+
+XT_CACHE_DIR = os.getenv("XT_CACHE_DIR", "data/cache/xt")
+# StatsBomb pitch coordinates
+PITCH_LENGTH = 120.0
+PITCH_WIDTH = 80.0
+XT_GRID = (16, 12)  # cells along the length, cells across the width
+XT_MAX_ITER = 100
+XT_TOL = 1e-8
+# Bump when the fit changes so cached grids are refitted
+XT_FIT_VERSION = 2
+PASS_FAILED = {"Incomplete", "Out", "Unknown", "Pass Offside", "Injury Clearance"}
+XT_COLUMNS = ["match_id", "type_name", "team_name", "player_id", "player_name", "x", "y",
+              "end_x", "end_y", "carry_end_x", "carry_end_y", "pass_outcome_name",
+              "shot_outcome_name", "shot_type_name", "Shoter_x", "Shoter_y"]
+
+
+def cell_index(x, y, grid: Tuple[int, int] = XT_GRID) -> np.ndarray:
+    """Flat cell number (row-major, width x length) for pitch coordinates; NaN -> -1"""
+    length, width = grid
+    x, y = np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    col = np.clip(np.floor(x / PITCH_LENGTH * length), 0, length - 1)
+    row = np.clip(np.floor(y / PITCH_WIDTH * width), 0, width - 1)
+    cells = row * length + col
+    return np.where(np.isnan(cells), -1, cells).astype("int64")
+
+
+def move_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Start / end coordinates and success flags of every pass and carry, one entry per event row"""
+    type_name = df["type_name"].to_numpy()
+    is_pass = type_name == "Pass"
+    is_carry = type_name == "Carry"
+    end_x = np.where(is_carry, df["carry_end_x"].to_numpy("float64"), df["end_x"].to_numpy("float64"))
+    end_y = np.where(is_carry, df["carry_end_y"].to_numpy("float64"), df["end_y"].to_numpy("float64"))
+    completed = is_carry | (is_pass & ~df["pass_outcome_name"].isin(PASS_FAILED).to_numpy())
+    return {
+        "is_move": is_pass | is_carry,
+        "completed": completed,
+        "x": df["x"].to_numpy("float64"),
+        "y": df["y"].to_numpy("float64"),
+        "end_x": end_x,
+        "end_y": end_y,
+    }
+
+
+def fit_xt(df: pd.DataFrame, grid: Tuple[int, int] = XT_GRID, max_iter: int = XT_MAX_ITER,
+           tol: float = XT_TOL) -> np.ndarray:
+    """Fit the xT surface (width x length) from an event DataFrame.
+
+    Per cell: shot and move probabilities, goal rate of shots there, and the
+    move transition matrix (failed moves lose the ball and carry no value).
+    Penalties are left out so they don't inflate the spot's cell.
+    """
+    length, width = grid
+    n_cells = length * width
+    moves = move_arrays(df)
+    start = cell_index(moves["x"], moves["y"], grid)
+    end = cell_index(moves["end_x"], moves["end_y"], grid)
+
+    # Shot rows carry their location in Shoter_x / Shoter_y, not x / y
+    shot_cell = cell_index(df["x"].fillna(df["Shoter_x"]), df["y"].fillna(df["Shoter_y"]), grid)
+
+    is_move = moves["is_move"] & (start >= 0)
+    is_shot = ((df["type_name"].to_numpy() == "Shot") & (df["shot_type_name"].to_numpy() != "Penalty")
+               & (shot_cell >= 0))
+    is_goal = is_shot & (df["shot_outcome_name"].to_numpy() == "Goal")
+    moved = is_move & moves["completed"] & (end >= 0)
+
+    move_count = np.bincount(start[is_move], minlength=n_cells).astype("float64")
+    shot_count = np.bincount(shot_cell[is_shot], minlength=n_cells).astype("float64")
+    goal_count = np.bincount(shot_cell[is_goal], minlength=n_cells).astype("float64")
+    transitions = np.bincount(start[moved] * n_cells + end[moved], minlength=n_cells * n_cells)
+    transitions = transitions.reshape(n_cells, n_cells).astype("float64")
+
+    actions = move_count + shot_count
+    shot_prob = np.divide(shot_count, actions, out=np.zeros(n_cells), where=actions > 0)
+    move_prob = np.divide(move_count, actions, out=np.zeros(n_cells), where=actions > 0)
+    goal_prob = np.divide(goal_count, shot_count, out=np.zeros(n_cells), where=shot_count > 0)
+    transitions = np.divide(transitions, move_count[:, None], out=np.zeros_like(transitions),
+                            where=move_count[:, None] > 0)
+
+    scoring = shot_prob * goal_prob
+    xt = np.zeros(n_cells)
+    for _ in range(max_iter):
+        new = scoring + move_prob * (transitions @ xt)
+        if np.abs(new - xt).max() < tol:
+            xt = new
+            break
+        xt = new
+    return xt.reshape(width, length)
+
+
+def load_events(event_dir: str = EVENT_DATA_DIR, columns: List[str] = XT_COLUMNS) -> pd.DataFrame:
+    paths = sorted(glob.glob(os.path.join(event_dir, "match_*_.csv")))
+    return pd.concat(
+        [pd.read_csv(path, usecols=lambda c: c in columns, low_memory=False) for path in paths],
+        ignore_index=True,
+    )
+
+
+def source_fingerprint(event_dir: str) -> List[List]:
+    """Name, size and mtime of every event file; a change invalidates the cached grid"""
+    return [
+        [os.path.basename(path), os.path.getsize(path), int(os.path.getmtime(path))]
+        for path in sorted(glob.glob(os.path.join(event_dir, "match_*_.csv")))
+    ]
+
+
+def load_xt_grid(event_dir: str = EVENT_DATA_DIR, grid: Tuple[int, int] = XT_GRID,
+                 refit: bool = False, cache_dir: str = XT_CACHE_DIR) -> np.ndarray:
+    """xT surface for the event store, from the disk cache when the files are unchanged"""
+    path = os.path.join(cache_dir, f"xt_{grid[0]}x{grid[1]}.npy")
+    meta_path = path[:-4] + ".json"
+    fingerprint = {"version": XT_FIT_VERSION, "event_dir": os.path.abspath(event_dir),
+                   "files": source_fingerprint(event_dir)}
+    if not refit and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            if json.load(f) == fingerprint:
+                return np.load(path)
+
+    if not fingerprint["files"]:
+        raise FileNotFoundError(f"No match_*_.csv event files in {event_dir}")
+    xt = fit_xt(load_events(event_dir), grid)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path, xt)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f)
+    print(f"🎯 Fitted {grid[0]}x{grid[1]} xT grid from {len(fingerprint['files'])} matches")
+    return xt
+
+
+def value_actions(df: pd.DataFrame, xt: np.ndarray) -> np.ndarray:
+    """Threat added by each event: xT(end) - xT(start) for completed passes and carries, NaN otherwise"""
+    width, length = xt.shape
+    moves = move_arrays(df)
+    start = cell_index(moves["x"], moves["y"], (length, width))
+    end = cell_index(moves["end_x"], moves["end_y"], (length, width))
+    flat = xt.ravel()
+    valued = moves["is_move"] & moves["completed"] & (start >= 0) & (end >= 0)
+    return np.where(valued, flat[end] - flat[np.maximum(start, 0)], np.nan)
+
+
+def threat_by_player(df: pd.DataFrame, xt: np.ndarray) -> pd.DataFrame:
+    """Total, passing and carrying xT added per player, highest first"""
+    values = value_actions(df, xt)
+    valued = ~np.isnan(values)
+    frame = pd.DataFrame({
+        "player_id": df["player_id"].to_numpy()[valued],
+        "player_name": df["player_name"].to_numpy()[valued],
+        "team_name": df["team_name"].to_numpy()[valued],
+        "type_name": df["type_name"].to_numpy()[valued],
+        "xT": values[valued],
+    })
+    totals = frame.groupby(["player_id", "player_name", "team_name"]).agg(
+        xT=("xT", "sum"), actions=("xT", "size"))
+    by_type = frame.pivot_table(index=["player_id", "player_name", "team_name"], columns="type_name",
+                                values="xT", aggfunc="sum", fill_value=0.0)
+    totals["pass_xT"] = by_type.get("Pass", 0.0)
+    totals["carry_xT"] = by_type.get("Carry", 0.0)
+    return totals.reset_index().sort_values("xT", ascending=False, ignore_index=True)
+
+
+def threat_by_zone(df: pd.DataFrame, xt: np.ndarray) -> np.ndarray:
+    """xT added by actions starting in each cell (width x length)"""
+    width, length = xt.shape
+    values = value_actions(df, xt)
+    valued = ~np.isnan(values)
+    start = cell_index(df["x"].to_numpy("float64")[valued], df["y"].to_numpy("float64")[valued], (length, width))
+    return np.bincount(start, weights=values[valued], minlength=xt.size).reshape(width, length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the xT grid and rank players by threat added")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--team", help="only rank this team's players")
+    parser.add_argument("--refit", action="store_true", help="ignore the cached grid")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    xt = load_xt_grid(args.event_dir, refit=args.refit)
+    events = load_events(args.event_dir)
+    if args.team:
+        events = events[events["team_name"] == args.team]
+    print(threat_by_player(events, xt).head(args.top).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
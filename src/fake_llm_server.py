@@ -0,0 +1,102 @@
+# Minimal OpenAI-compatible chat completions server for offline tests and batch dry runs.
+# python -m src.fake_llm_server --port 8001  →  OPENAI_BASE_URL=http://127.0.0.1:8001/v1
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+def fake_answer(messages: list) -> str:
+    prompt = messages[-1].get("content", "") if messages else ""
+    question = prompt.rsplit("Question:", 1)[-1].strip()
+    return f"Fake analysis for: {question} (prompt of {len(prompt)} characters)."
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    server_version = "FakeLLM/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.request_count += 1
+
+        if random.random() < self.server.failure_rate:
+            self._send_json(503, {"error": {"message": "fake overload", "type": "server_error"}})
+            return
+        time.sleep(self.server.latency)
+
+        answer = fake_answer(request.get("messages", []))
+        model = request.get("model", "fake")
+        created = int(time.time())
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": answer}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                             "finish_reason": "stop" if i == len(words) - 1 else None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_fake_server(port: int = 0, latency: float = 0.0, token_delay: float = 0.0,
+                      failure_rate: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve on a background thread; returns the server and its /v1 base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.latency = latency
+    server.token_delay = token_delay
+    server.failure_rate = failure_rate
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed words")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(args.port, args.latency, args.token_delay, args.failure_rate)
+    print(f"🧪 Fake LLM server on {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import os
+import re
+import pandas as pd
+from typing import Dict, List, Optional
+
+# Folder where all match files are stored
+DATA_DIR = "data/files1/"
+MATCH_INFO_PATH = os.path.join(DATA_DIR, "match_info.csv")
+# match_info.csv has no kickoff date, the season team table does
+TEAM_MATCH_CSV_PATH = os.path.join(DATA_DIR, "J1_teams_with_match_id.csv")
+
+# match_<id>__team_<Name>_summary.json, match_<id>___player_<Name>_TV.parquet,
+# match_<id>__TV.parquet, match_<id>_Team_stat.csv, match_<id>_player_stats.csv
+FILE_PATTERN = re.compile(
+    r"^match_(\d+)_+(?:(team|player)_(.+?)_)?(summary\.json|TV\.parquet|Team_stat\.csv|player_stats\.csv)$"
+)
+
+KIND_BY_SUFFIX = {
+    "summary.json": "summary",
+    "TV.parquet": "tv",
+    "Team_stat.csv": "team_stats",
+    "player_stats.csv": "player_stats",
+}
+
+
+def normalize_name(name: str) -> str:
+    """Key used to compare team/player names coming from files, CSVs and queries"""
+    return " ".join(str(name).replace("_", " ").split()).casefold()
+
+
+def parse_catalog_filename(filename: str) -> Optional[Dict[str, str]]:
+    """Split a data file name into match_id, kind, team and player"""
+    match = FILE_PATTERN.match(filename)
+    if not match:
+        return None
+    match_id, owner, name, suffix = match.groups()
+    kind = KIND_BY_SUFFIX[suffix]
+    if owner:
+        kind = f"{owner}_{kind}"
+    elif kind == "tv":
+        kind = "match_tv"
+    return {
+        "match_id": match_id,
+        "kind": kind,
+        "team": name.replace("_", " ") if owner == "team" else None,
+        "player": name.replace("_", " ") if owner == "player" else None,
+    }
+
+
+def same_team(a: str, b: str) -> bool:
+    """Loose team-name match: the sources disagree on prefixes ("Machida Zelvia" vs "FC Machida Zelvia")"""
+    a, b = normalize_name(a), normalize_name(b)
+    return a in b or b in a
+
+
+MATCH_RESULT = re.compile(r"^(.+?)\s+\d+\s*-\s*\d+\s+(.+)$")
+
+
+def load_match_dates(path: str = TEAM_MATCH_CSV_PATH,
+                     match_teams: Optional[Dict[str, tuple]] = None) -> Dict[str, pd.Timestamp]:
+    """match_id -> kickoff date.
+
+    The team table reuses one match_id for both fixtures between two teams;
+    with match_teams (match_id -> (home, away)) the row whose "Home x-y Away"
+    string has that home / away order wins.
+    """
+    try:
+        df = pd.read_csv(path, usecols=["match_id", "Date", "Match"]).dropna(subset=["match_id", "Date"])
+    except Exception as e:
+        print(f"⚠️ Could not load match dates from {path}: {e}")
+        return {}
+    df["match_id"] = df["match_id"].astype(int).astype(str)
+    df["Date"] = pd.to_datetime(df["Date"], format="mixed", errors="coerce")
+    df = df.dropna(subset=["Date"])
+    if match_teams:
+        def is_listed_fixture(match_id, result) -> bool:
+            parsed = MATCH_RESULT.match(str(result))
+            teams = match_teams.get(match_id)
+            return bool(parsed and teams) and all(same_team(x, y) for x, y in zip(parsed.groups(), teams))
+        listed = [is_listed_fixture(m, r) for m, r in zip(df["match_id"], df["Match"])]
+        # Matching fixture first; other rows only fill ids match_info doesn't resolve
+        df = df.assign(listed=listed).sort_values("listed", ascending=False, kind="stable")
+    df = df.drop_duplicates("match_id")
+    return dict(zip(df["match_id"], df["Date"]))
+
+
+def load_match_teams(path: str = MATCH_INFO_PATH) -> Dict[str, tuple]:
+    """match_id -> (home_team, away_team)"""
+    try:
+        df = pd.read_csv(path, usecols=["match_id", "home_team", "away_team"])
+    except Exception as e:
+        print(f"⚠️ Could not load match info from {path}: {e}")
+        return {}
+    return {str(m): (h, a) for m, h, a in zip(df["match_id"], df["home_team"], df["away_team"])}
+
+
+class FileCatalog:
+    """In-memory index of every summary/stat/TV file in DATA_DIR.
+
+    Built from a single directory scan; lookups are dict accesses and team
+    histories are ordered by kickoff date, not file mtime.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self.match_teams = load_match_teams()
+        self.match_dates = load_match_dates(match_teams=self.match_teams)
+        self.entries: List[Dict] = []
+        self._by_match: Dict[str, Dict[str, List[Dict]]] = {}
+        self._team_matches: Dict[str, List[str]] = {}
+
+        with os.scandir(data_dir) as it:
+            for dir_entry in it:
+                info = parse_catalog_filename(dir_entry.name)
+                if info is None or not dir_entry.is_file():
+                    continue
+                info["path"] = os.path.join(data_dir, dir_entry.name)
+                info["date"] = self.match_dates.get(info["match_id"])
+                self.entries.append(info)
+                self._by_match.setdefault(info["match_id"], {}).setdefault(info["kind"], []).append(info)
+
+        for match_id, kinds in self._by_match.items():
+            for entry in kinds.get("team_summary", []):
+                self._team_matches.setdefault(normalize_name(entry["team"]), []).append(match_id)
+            for kind_entries in kinds.values():
+                kind_entries.sort(key=lambda e: e["path"])
+
+        for match_ids in self._team_matches.values():
+            match_ids.sort(key=self._match_sort_key, reverse=True)
+
+    def _match_sort_key(self, match_id: str):
+        date = self.match_dates.get(match_id)
+        return (date if date is not None else pd.Timestamp.min, int(match_id))
+
+    def files(self, match_id: str, kind: str) -> List[Dict]:
+        return self._by_match.get(str(match_id), {}).get(kind, [])
+
+    def path(self, match_id: str, kind: str, name: Optional[str] = None) -> Optional[str]:
+        """First file of `kind` for the match, optionally for a given team/player"""
+        for entry in self.files(match_id, kind):
+            owner = entry["team"] or entry["player"]
+            if name is None or (owner and normalize_name(owner) == normalize_name(name)):
+                return entry["path"]
+        return None
+
+    def team_summaries(self, match_id: str) -> List[Dict]:
+        return self.files(match_id, "team_summary")
+
+    def last_team_matches(self, team_name: str, n: int = 3) -> List[Dict]:
+        """Team summary entries for the team's last n matches, newest kickoff first"""
+        key = normalize_name(team_name)
+        entries = []
+        for match_id in self._team_matches.get(key, [])[:n]:
+            entries += [e for e in self.team_summaries(match_id) if normalize_name(e["team"]) == key]
+        return entries
+
+
+_catalog: Optional[FileCatalog] = None
+_catalog_signature = None
+
+
+def _directory_signature(data_dir: str):
+    # Adding, removing or renaming a file bumps the directory mtime, so three
+    # stat calls tell us whether a rescan is needed instead of one per file.
+    signature = []
+    for path in (data_dir, MATCH_INFO_PATH, TEAM_MATCH_CSV_PATH):
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_catalog(data_dir: str = DATA_DIR) -> FileCatalog:
+    """Return the process-wide catalog, rescanning only when DATA_DIR changed"""
+    global _catalog, _catalog_signature
+    signature = _directory_signature(data_dir)
+    if _catalog is None or _catalog.data_dir != data_dir or signature != _catalog_signature:
+        _catalog = FileCatalog(data_dir)
+        _catalog_signature = signature
+        print(f"🗂️ Catalog built: {len(_catalog.entries)} files, {len(_catalog._by_match)} matches")
+    return _catalog
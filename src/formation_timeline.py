@@ -0,0 +1,260 @@
+# Formation timeline: which shape and which XI each team had on the pitch at
+# every moment of a match. Starting XI, Tactical Shift, Substitution and
+# sending-off events open a new segment; segments are keyed by
+# (period, clock time) so any event table can be tagged with one searchsorted.
+# python -m src.formation_timeline [--match-id 3925235] [--team "Kashiwa Reysol"] [--rebuild]
+import os
+import ast
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+from src.pass_graph import EVENT_DATA_DIR
+from src.expected_threat import PASS_FAILED, load_events, source_fingerprint
+
+FORMATION_CACHE_DIR = os.getenv("FORMATION_CACHE_DIR", "data/cache/formations")
+FORMATION_TIMELINE_FILE = "formation_timeline.parquet"
+# Bump when the timeline layout changes so cached timelines are rebuilt
+FORMATION_TIMELINE_VERSION = 1
+LINEUP_EVENTS = {"Starting XI", "Tactical Shift"}
+SENDING_OFF_CARDS = {"Red Card", "Second Yellow"}
+CARD_COLUMNS = ["foul_committed_card_name", "bad_behaviour_card_name"]
+# Sort-key spacing: seconds within a period, periods within a team-match
+PERIOD_SPAN = 10_000
+GROUP_SPAN = 10 * PERIOD_SPAN
+# Match-clock minute at which each period kicks off (StatsBomb periods 3-5: extra time, penalties)
+PERIOD_START_MINUTE = {1: 0, 2: 45, 3: 90, 4: 105, 5: 120}
+FORMATION_COLUMNS = ["index", "match_id", "period", "timestamp", "type_name", "team_name", "player_id",
+                     "tactics_formation", "tactics_lineup", "substitution_replacement_id",
+                     "shot_statsbomb_xg", "shot_outcome_name", "pass_outcome_name"] + CARD_COLUMNS
+
+
+def clock_seconds(timestamp) -> np.ndarray:
+    """Seconds since the start of the period for "HH:MM:SS.fff" timestamps"""
+    return pd.to_timedelta(pd.Series(timestamp, dtype="object")).dt.total_seconds().to_numpy()
+
+
+def format_formation(value) -> Optional[str]:
+    """tactics_formation as stored (4231.0 / "4231") -> "4231" """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return str(int(float(value)))
+
+
+def parse_lineup(value) -> Dict[int, int]:
+    """tactics_lineup -> {player_id: position_id}"""
+    entries = ast.literal_eval(value) if isinstance(value, str) else (value or [])
+    return {int(e["player.id"]): int(e["position.id"]) for e in entries}
+
+
+def _sent_off(changes: pd.DataFrame) -> np.ndarray:
+    sent_off = np.zeros(len(changes), dtype=bool)
+    for col in CARD_COLUMNS:
+        if col in changes:
+            sent_off |= changes[col].isin(SENDING_OFF_CARDS).to_numpy()
+    return sent_off
+
+
+def build_formation_timeline(events: pd.DataFrame) -> pd.DataFrame:
+    """One row per formation / lineup segment of each team in each match.
+
+    Events must be in match order. A segment runs from its (period, start)
+    to the next segment of the same team, or to the end of the match;
+    `minutes` is its playing time with the gaps between periods left out.
+    """
+    events = events.copy()
+    events["clock"] = clock_seconds(events["timestamp"])
+    period_end = events.groupby(["match_id", "period"])["clock"].max()
+
+    sent_off = _sent_off(events)
+    is_change = events["type_name"].isin(LINEUP_EVENTS | {"Substitution"}).to_numpy() | sent_off
+    changes, changes_sent_off = events[is_change], sent_off[is_change]
+
+    rows = []
+    lineups: Dict[tuple, Dict[int, int]] = {}
+    formations: Dict[tuple, Optional[str]] = {}
+    # Tactical Shift lineups still list sent-off players, so they are dropped here
+    dismissed: Dict[tuple, set] = {}
+    for row, off in zip(changes.itertuples(index=False), changes_sent_off):
+        key = (row.match_id, row.team_name)
+        if row.type_name in LINEUP_EVENTS:
+            lineup = parse_lineup(row.tactics_lineup)
+            lineups[key] = {p: pos for p, pos in lineup.items() if p not in dismissed.get(key, ())}
+            formations[key] = format_formation(row.tactics_formation)
+        elif key not in lineups:
+            continue
+        else:
+            lineup = dict(lineups[key])
+            player = int(row.player_id) if pd.notna(row.player_id) else None
+            if row.type_name == "Substitution" and player in lineup and pd.notna(row.substitution_replacement_id):
+                lineup[int(row.substitution_replacement_id)] = lineup.pop(player)
+            elif off and player in lineup:
+                lineup.pop(player)
+                dismissed.setdefault(key, set()).add(player)
+            else:
+                continue
+            lineups[key] = lineup
+        players = sorted(lineups[key], key=lineups[key].get)
+        rows.append({
+            "match_id": row.match_id,
+            "team_name": row.team_name,
+            "period": int(row.period),
+            "start": float(row.clock),
+            "event": "Sending Off" if off and row.type_name not in LINEUP_EVENTS else row.type_name,
+            "formation": formations[key],
+            "player_ids": players,
+            "position_ids": [lineups[key][p] for p in players],
+        })
+
+    columns = ["match_id", "team_name", "period", "start", "event", "formation", "player_ids", "position_ids"]
+    timeline = pd.DataFrame(rows, columns=columns)
+    # A substitution and the tactical shift that follows it share a moment: keep the latest state
+    timeline = timeline.drop_duplicates(["match_id", "team_name", "period", "start"], keep="last")
+    timeline = timeline.sort_values(["match_id", "team_name", "period", "start"], kind="stable").reset_index(drop=True)
+    timeline["minute"] = timeline["period"].map(PERIOD_START_MINUTE).fillna(0).astype(int) + \
+        (timeline["start"] // 60).astype(int)
+    timeline["players_on_pitch"] = timeline["player_ids"].map(len)
+    timeline["minutes"] = _segment_minutes(timeline, period_end)
+    return timeline
+
+
+def _segment_minutes(timeline: pd.DataFrame, period_end: pd.Series) -> np.ndarray:
+    minutes = np.zeros(len(timeline))
+    for (match_id, _), segments in timeline.groupby(["match_id", "team_name"], sort=False):
+        ends = period_end.loc[match_id]
+        bounds = list(zip(segments["period"], segments["start"]))
+        bounds.append((int(ends.index.max()), float(ends.iloc[-1])))
+        for i, row in enumerate(segments.index):
+            (p0, t0), (p1, t1) = bounds[i], bounds[i + 1]
+            if p0 == p1:
+                seconds = t1 - t0
+            else:
+                seconds = (ends.get(p0, t0) - t0) + t1 + sum(ends.get(p, 0.0) for p in range(p0 + 1, p1))
+            minutes[row] = max(seconds, 0.0) / 60
+    return minutes
+
+
+def _group_codes(match_id, team_name, groups: pd.MultiIndex) -> np.ndarray:
+    return groups.get_indexer(pd.MultiIndex.from_arrays([np.asarray(match_id), np.asarray(team_name)]))
+
+
+def tag_events(events: pd.DataFrame, timeline: pd.DataFrame) -> pd.DataFrame:
+    """Formation and segment in effect for the acting team and its opponent at every event.
+
+    Returns a frame aligned with events: segment / opponent_segment are rows
+    of the timeline (-1 before a team's first lineup event), formation /
+    opponent_formation the shapes in effect.
+    """
+    groups = pd.MultiIndex.from_arrays([timeline["match_id"], timeline["team_name"]]).unique()
+    seg_group = _group_codes(timeline["match_id"], timeline["team_name"], groups)
+    seg_key = seg_group * GROUP_SPAN + timeline["period"].to_numpy() * PERIOD_SPAN + timeline["start"].to_numpy()
+    order = np.argsort(seg_key, kind="stable")
+    seg_key, seg_group = seg_key[order], seg_group[order]
+
+    # Opponent of each (match, team) group: the other team of the match
+    pairs = pd.DataFrame({"match_id": groups.get_level_values(0), "team_name": groups.get_level_values(1)})
+    pairs = pairs.merge(pairs, on="match_id", suffixes=("", "_opponent"))
+    pairs = pairs[pairs["team_name"] != pairs["team_name_opponent"]]
+    group_opponent = np.full(len(groups) + 1, None, dtype=object)
+    group_opponent[_group_codes(pairs["match_id"], pairs["team_name"], groups)] = pairs["team_name_opponent"].to_numpy()
+
+    match_id = events["match_id"].to_numpy()
+    team = events["team_name"].to_numpy()
+    opponent = group_opponent[_group_codes(match_id, team, groups)]  # -1 (unknown team) -> last slot, None
+    time_key = events["period"].to_numpy() * PERIOD_SPAN + clock_seconds(events["timestamp"])
+
+    def lookup(team_names):
+        group = _group_codes(match_id, team_names, groups)
+        pos = np.searchsorted(seg_key, group * GROUP_SPAN + time_key, side="right") - 1
+        found = (group >= 0) & (pos >= 0)
+        found[found] &= seg_group[pos[found]] == group[found]
+        return np.where(found, order[np.maximum(pos, 0)], -1)
+
+    formation = timeline["formation"].to_numpy(dtype=object)
+    tagged = pd.DataFrame(index=events.index)
+    for prefix, names in (("", team), ("opponent_", opponent)):
+        segment = lookup(names)
+        tagged[f"{prefix}segment"] = segment
+        tagged[f"{prefix}formation"] = np.where(segment >= 0, formation[np.maximum(segment, 0)], None)
+    tagged["opponent_name"] = opponent
+    return tagged
+
+
+def formation_performance(events: pd.DataFrame, timeline: pd.DataFrame) -> pd.DataFrame:
+    """Season output of every team per formation, raw and per 90 minutes in that shape"""
+    tagged = pd.concat([events[["team_name", "type_name", "shot_statsbomb_xg", "shot_outcome_name",
+                                "pass_outcome_name"]], tag_events(events, timeline)], axis=1)
+    shot = tagged["type_name"] == "Shot"
+    tagged["shots"] = shot
+    tagged["xg"] = tagged["shot_statsbomb_xg"].where(shot, 0.0).fillna(0.0)
+    tagged["goals"] = shot & (tagged["shot_outcome_name"] == "Goal")
+    tagged["passes"] = tagged["type_name"] == "Pass"
+    tagged["passes_completed"] = tagged["passes"] & ~tagged["pass_outcome_name"].isin(PASS_FAILED)
+
+    measures = ["shots", "xg", "goals"]
+    own = tagged.groupby(["team_name", "formation"])[measures + ["passes", "passes_completed"]].sum()
+    against = tagged.groupby(["opponent_name", "opponent_formation"])[measures].sum()
+    against.index.names = ["team_name", "formation"]
+    usage = timeline.groupby(["team_name", "formation"]).agg(minutes=("minutes", "sum"),
+                                                            matches=("match_id", "nunique"))
+
+    table = usage.join(own).join(against.add_suffix("_against")).fillna(0.0)
+    per90 = 90 / table["minutes"].where(table["minutes"] > 0)
+    for col in ("xg", "xg_against", "shots", "shots_against"):
+        table[f"{col}_per90"] = table[col] * per90
+    table["pass_completion"] = table["passes_completed"] / table["passes"].where(table["passes"] > 0)
+    return table.reset_index().sort_values(["team_name", "minutes"], ascending=[True, False], ignore_index=True)
+
+
+def load_formation_timeline(event_dir: str = EVENT_DATA_DIR, rebuild: bool = False,
+                            cache_dir: str = FORMATION_CACHE_DIR) -> pd.DataFrame:
+    """Timeline for the event store, rebuilt only when the event files changed"""
+    path = os.path.join(cache_dir, FORMATION_TIMELINE_FILE)
+    meta_path = path + ".json"
+    fingerprint = {"version": FORMATION_TIMELINE_VERSION, "event_dir": os.path.abspath(event_dir),
+                   "files": source_fingerprint(event_dir)}
+    if not rebuild and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            if json.load(f) == fingerprint:
+                return pd.read_parquet(path)
+
+    if not fingerprint["files"]:
+        raise FileNotFoundError(f"No match_*_.csv event files in {event_dir}")
+    timeline = build_formation_timeline(load_events(event_dir, FORMATION_COLUMNS))
+    os.makedirs(cache_dir, exist_ok=True)
+    timeline.to_parquet(path, index=False)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f)
+    print(f"🧩 Built formation timeline: {len(timeline)} segments from {len(fingerprint['files'])} matches")
+    return timeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Formation timelines and performance by formation")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--match-id", type=int, help="print this match's timeline instead of the season table")
+    parser.add_argument("--team")
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    timeline = load_formation_timeline(args.event_dir, rebuild=args.rebuild)
+    if args.match_id:
+        rows = timeline[timeline["match_id"] == args.match_id]
+        if args.team:
+            rows = rows[rows["team_name"] == args.team]
+        columns = ["team_name", "minute", "event", "formation", "players_on_pitch", "minutes"]
+        print(rows[columns].round(1).to_string(index=False))
+        return
+
+    table = formation_performance(load_events(args.event_dir, FORMATION_COLUMNS), timeline)
+    if args.team:
+        table = table[table["team_name"] == args.team]
+    columns = ["team_name", "formation", "matches", "minutes", "xg_per90", "xg_against_per90",
+               "goals", "goals_against", "pass_completion"]
+    print(table[columns].round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
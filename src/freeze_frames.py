@@ -0,0 +1,195 @@
+# Shot freeze frames: every player StatsBomb saw at the moment of each shot.
+# Frames are parsed once into one flat table, and spatial queries run for all
+# shots at once through a single KD-tree in which each shot gets its own band
+# of the x axis, so per-shot neighbourhoods never mix.
+# python -m src.freeze_frames [--team "Urawa Reds"]
+import os
+import ast
+import glob
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from typing import Dict
+
+from src.pass_graph import EVENT_DATA_DIR
+
+# StatsBomb goal: posts at y = 36 and y = 44 on the x = 120 line
+GOAL_X = 120.0
+POST_Y = (36.0, 44.0)
+# Opponents this close to the shooter count as pressing the shot
+PRESSURE_RADIUS = 3.0
+# Offset between two shots' bands in the shared KD-tree (well beyond any query radius)
+SHOT_BAND = 1000.0
+FREEZE_FRAME_COLUMNS = ["index", "match_id", "type_name", "team_name", "player_id", "player_name",
+                        "x", "y", "Shoter_x", "Shoter_y", "shot_statsbomb_xg", "shot_outcome_name",
+                        "shot_freeze_frame"]
+
+
+def _frame_entries(value):
+    if isinstance(value, str):
+        return ast.literal_eval(value)
+    return value if value is not None else []
+
+
+def parse_freeze_frames(events: pd.DataFrame):
+    """(shots, frames) tables for the Shot rows of an event DataFrame.
+
+    shots: one row per shot (shot, match_id, team, shooter, location, xG,
+    outcome). frames: one row per player in a shot's freeze frame, with
+    `shot` pointing at the shot's row in `shots`.
+    """
+    rows = events[events["type_name"] == "Shot"]
+    x = rows["x"].fillna(rows["Shoter_x"]) if "Shoter_x" in rows else rows["x"]
+    y = rows["y"].fillna(rows["Shoter_y"]) if "Shoter_y" in rows else rows["y"]
+    shots = pd.DataFrame({
+        "shot_id": rows["index"].to_numpy(),
+        "match_id": rows["match_id"].to_numpy(),
+        "team_name": rows["team_name"].to_numpy(),
+        "player_id": rows["player_id"].to_numpy(),
+        "player_name": rows["player_name"].to_numpy(),
+        "x": x.to_numpy("float64"),
+        "y": y.to_numpy("float64"),
+        "xg": rows["shot_statsbomb_xg"].to_numpy("float64"),
+        "outcome": rows["shot_outcome_name"].to_numpy(),
+    })
+
+    shot, player_id, teammate, fx, fy, position = [], [], [], [], [], []
+    for i, value in enumerate(rows["shot_freeze_frame"].tolist()):
+        if not isinstance(value, (str, list)):
+            continue
+        for entry in _frame_entries(value):
+            shot.append(i)
+            player_id.append(entry.get("player.id"))
+            teammate.append(bool(entry.get("teammate")))
+            fx.append(entry["location"][0])
+            fy.append(entry["location"][1])
+            position.append(entry.get("position.name"))
+    frames = pd.DataFrame({
+        "shot": np.asarray(shot, dtype="int64"),
+        "player_id": player_id,
+        "teammate": np.asarray(teammate, dtype=bool),
+        "x": np.asarray(fx, dtype="float64"),
+        "y": np.asarray(fy, dtype="float64"),
+        "position": position,
+    })
+    return shots, frames
+
+
+class FrameIndex:
+    """One cKDTree over a subset of frame players, every shot in its own x band"""
+
+    def __init__(self, frames: pd.DataFrame):
+        self.shot = frames["shot"].to_numpy()
+        points = np.column_stack([frames["x"].to_numpy() + self.shot * SHOT_BAND, frames["y"].to_numpy()])
+        self.tree = cKDTree(points) if len(points) else None
+
+    def _banded(self, x, y, shot) -> np.ndarray:
+        return np.column_stack([np.asarray(x) + np.asarray(shot) * SHOT_BAND, np.asarray(y)])
+
+    def nearest(self, x, y, shot) -> np.ndarray:
+        """Distance from each query point to the nearest indexed player of the same shot (inf if none)"""
+        points = self._banded(x, y, shot)
+        dist = np.full(len(points), np.inf)
+        valid = np.isfinite(points).all(axis=1)
+        if self.tree is not None and valid.any():
+            dist[valid] = self.tree.query(points[valid], distance_upper_bound=SHOT_BAND / 2)[0]
+        return dist
+
+    def count_within(self, x, y, shot, radius: float) -> np.ndarray:
+        """Indexed players of the same shot within radius of each query point"""
+        points = self._banded(x, y, shot)
+        counts = np.zeros(len(points), dtype="int64")
+        valid = np.isfinite(points).all(axis=1)
+        if self.tree is not None and valid.any():
+            counts[valid] = self.tree.query_ball_point(points[valid], radius, return_length=True)
+        return counts
+
+
+def in_shooting_cone(px, py, sx, sy) -> np.ndarray:
+    """Whether points lie in the triangle between the shooter and the two posts"""
+    corners = [(sx, sy), (GOAL_X, POST_Y[0]), (GOAL_X, POST_Y[1])]
+    signs = []
+    for (ax, ay), (bx, by) in zip(corners, corners[1:] + corners[:1]):
+        signs.append((bx - ax) * (py - ay) - (by - ay) * (px - ax))
+    signs = np.stack(signs)
+    return (signs >= 0).all(axis=0) | (signs <= 0).all(axis=0)
+
+
+def shot_context(events: pd.DataFrame) -> pd.DataFrame:
+    """Per-shot geometry and defensive context for every shot in events"""
+    shots, frames = parse_freeze_frames(events)
+    n = len(shots)
+    sx, sy = shots["x"].to_numpy(), shots["y"].to_numpy()
+
+    dx, dy_near, dy_far = GOAL_X - sx, POST_Y[0] - sy, POST_Y[1] - sy
+    shots["distance"] = np.hypot(dx, (POST_Y[0] + POST_Y[1]) / 2 - sy)
+    shots["angle"] = np.degrees(np.abs(np.arctan2(dy_far, dx) - np.arctan2(dy_near, dx)))
+    shots["has_frame"] = np.bincount(frames["shot"], minlength=n) > 0
+
+    opponents = frames[~frames["teammate"]]
+    goalkeeper = opponents["position"].to_numpy() == "Goalkeeper"
+    defenders = opponents[~goalkeeper]
+    keepers = opponents[goalkeeper].drop_duplicates("shot")
+
+    shot_ids = np.arange(n)
+    defender_index = FrameIndex(defenders)
+    shots["nearest_defender"] = defender_index.nearest(sx, sy, shot_ids)
+    shots["defenders_pressing"] = defender_index.count_within(sx, sy, shot_ids, PRESSURE_RADIUS)
+    shots["teammates_in_frame"] = np.bincount(frames.loc[frames["teammate"], "shot"], minlength=n)
+
+    d_shot = defenders["shot"].to_numpy()
+    cone = in_shooting_cone(defenders["x"].to_numpy(), defenders["y"].to_numpy(), sx[d_shot], sy[d_shot])
+    shots["defenders_in_cone"] = np.bincount(d_shot[cone], minlength=n)
+
+    k_shot = keepers["shot"].to_numpy()
+    gk_x, gk_y = np.full(n, np.nan), np.full(n, np.nan)
+    gk_x[k_shot], gk_y[k_shot] = keepers["x"].to_numpy(), keepers["y"].to_numpy()
+    shots["gk_x"], shots["gk_y"] = gk_x, gk_y
+    shots["gk_off_line"] = GOAL_X - gk_x
+    shots["gk_in_cone"] = in_shooting_cone(gk_x, gk_y, sx, sy) & ~np.isnan(gk_x)
+    shots["nearest_defender"] = shots["nearest_defender"].where(shots["has_frame"])
+    return shots
+
+
+def summarize_shot_context(shots: pd.DataFrame) -> Dict[str, float]:
+    """Averages over the shots that have a freeze frame, for summaries and shot maps"""
+    framed = shots[shots["has_frame"]]
+    if framed.empty:
+        return {}
+    nearest = framed["nearest_defender"].replace(np.inf, np.nan)
+    return {
+        "shots_with_frame": int(len(framed)),
+        "avg_defenders_in_cone": round(float(framed["defenders_in_cone"].mean()), 2),
+        "clear_sight_shots": int((framed["defenders_in_cone"] == 0).sum()),
+        "pressed_shots": int((framed["defenders_pressing"] > 0).sum()),
+        "avg_nearest_defender": round(float(nearest.mean()), 2) if nearest.notna().any() else None,
+        "avg_gk_off_line": round(float(framed["gk_off_line"].mean()), 2) if framed["gk_off_line"].notna().any() else None,
+        "avg_shot_distance": round(float(framed["distance"].mean()), 2),
+    }
+
+
+def load_shot_events(event_dir: str = EVENT_DATA_DIR) -> pd.DataFrame:
+    paths = sorted(glob.glob(os.path.join(event_dir, "match_*_.csv")))
+    frames = [pd.read_csv(path, usecols=lambda c: c in FREEZE_FRAME_COLUMNS, low_memory=False) for path in paths]
+    events = pd.concat(frames, ignore_index=True)
+    return events[events["type_name"] == "Shot"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Freeze-frame context of every shot in the event store")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--team", help="only shots by this team")
+    args = parser.parse_args()
+
+    events = load_shot_events(args.event_dir)
+    if args.team:
+        events = events[events["team_name"] == args.team]
+    shots = shot_context(events)
+    print(f"📐 {len(shots)} shots, {int(shots['has_frame'].sum())} with freeze frames")
+    for key, value in summarize_shot_context(shots).items():
+        print(f"- {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
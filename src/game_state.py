@@ -0,0 +1,208 @@
+# Game-state segmentation: the score, the numbers on the pitch and the
+# 15-minute band in effect at every event, from the acting team's point of
+# view. Running goals and dismissals are cumulative sums per match, so the
+# whole season is labelled in one pass and any metric can be grouped by the
+# state columns (or the combined state_key) directly.
+# python -m src.game_state [--team "Urawa Reds"] [--by score_state manpower]
+import argparse
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence, Tuple
+
+from src.pass_graph import EVENT_DATA_DIR
+from src.expected_threat import PASS_FAILED, load_events
+from src.formation_timeline import CARD_COLUMNS, SENDING_OFF_CARDS, clock_seconds
+
+MINUTE_BAND = 15
+SCORE_STATES = ["leading", "drawing", "trailing"]
+MANPOWER_STATES = ["man-up", "even", "man-down"]
+MINUTE_BANDS = ["0-15", "15-30", "30-45", "45-60", "60-75", "75-90", "90+", "extra time"]
+STATE_DIMENSIONS = ["score_state", "manpower", "minute_band"]
+# The same moment seen from the other team
+MIRROR = {"leading": "trailing", "drawing": "drawing", "trailing": "leading",
+          "man-up": "man-down", "even": "even", "man-down": "man-up"}
+DUEL_WON = {"Won", "Success In Play", "Success Out"}
+# Pressing actions and passes allowed for PPDA, as in the match report
+PPDA_ACTIONS = {"Interception", "Foul Committed", "BlockedPass", "Dribbled Past"}
+PPDA_ACTION_MIN_X = 35
+PPDA_PASS_MAX_X = 80
+GAME_STATE_COLUMNS = ["match_id", "period", "minute", "timestamp", "type_name", "team_name", "x",
+                      "pass_outcome_name", "shot_statsbomb_xg", "shot_outcome_name", "duel_type_name",
+                      "duel_outcome_name", "block_save_block"] + CARD_COLUMNS
+
+
+def match_sides(events: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """(home, opponent_name) per event; home = the acting team is the first team seen in its match"""
+    match_id = events["match_id"]
+    team = events["team_name"]
+    first = team.groupby(match_id).transform("first")
+    other = team.where(team != first).groupby(match_id).transform("first")
+    home = (team == first).to_numpy()
+    return home, np.where(home, other.to_numpy(dtype=object), first.to_numpy(dtype=object))
+
+
+def _running_for_against(flag: np.ndarray, home: np.ndarray, match_id: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Cumulative count of flagged events for / against the acting team, before each event"""
+    home_flag, away_flag = flag & home, flag & ~home
+    home_before = pd.Series(home_flag).groupby(match_id).cumsum().to_numpy() - home_flag
+    away_before = pd.Series(away_flag).groupby(match_id).cumsum().to_numpy() - away_flag
+    return np.where(home, home_before, away_before), np.where(home, away_before, home_before)
+
+
+def running_score(events: pd.DataFrame, home: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(goals_for, goals_against) of the acting team just before each event.
+
+    Events must be in match order. Goals are shots with outcome Goal plus
+    "Own Goal For" events, credited to the row's team.
+    """
+    goal = ((events["type_name"] == "Shot") & (events["shot_outcome_name"] == "Goal")) | \
+        (events["type_name"] == "Own Goal For")
+    home = match_sides(events)[0] if home is None else home
+    return _running_for_against(goal.to_numpy(), home, events["match_id"].to_numpy())
+
+
+def score_state(events: pd.DataFrame) -> np.ndarray:
+    """Score state of the acting team just before each event: leading / drawing / trailing"""
+    goals_for, goals_against = running_score(events)
+    diff = goals_for - goals_against
+    return np.select([diff > 0, diff < 0], ["leading", "trailing"], "drawing")
+
+
+def players_on_pitch(events: pd.DataFrame, home: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(players, opponent_players) on the pitch before each event, from red cards and second yellows"""
+    sent_off = np.zeros(len(events), dtype=bool)
+    for col in CARD_COLUMNS:
+        if col in events:
+            sent_off |= events[col].isin(SENDING_OFF_CARDS).to_numpy()
+    home = match_sides(events)[0] if home is None else home
+    own, opponent = _running_for_against(sent_off, home, events["match_id"].to_numpy())
+    return 11 - own, 11 - opponent
+
+
+def minute_band(period, minute) -> np.ndarray:
+    """15-minute band of the match clock; first-half stoppage time stays in 30-45"""
+    period = np.asarray(period)
+    minute = np.asarray(minute, dtype="int64")
+    minute = np.where(period == 1, np.minimum(minute, 44), np.maximum(minute, 45))
+    code = np.minimum(minute // MINUTE_BAND, 6)
+    code = np.where(period >= 3, 7, code)
+    return np.asarray(MINUTE_BANDS, dtype=object)[code]
+
+
+def game_state(events: pd.DataFrame) -> pd.DataFrame:
+    """State of the acting team at every event, aligned with events.
+
+    score_state, manpower and minute_band are categoricals (groupby-ready,
+    empty states kept out with observed=True); state_key joins all three.
+    """
+    home, opponent = match_sides(events)
+    goals_for, goals_against = running_score(events, home)
+    players, opponent_players = players_on_pitch(events, home)
+    diff = goals_for - goals_against
+    score = np.select([diff > 0, diff < 0], ["leading", "trailing"], "drawing")
+    manpower = np.select([players > opponent_players, players < opponent_players], ["man-up", "man-down"], "even")
+
+    state = pd.DataFrame({
+        "opponent_name": opponent,
+        "goals_for": goals_for,
+        "goals_against": goals_against,
+        "players": players,
+        "opponent_players": opponent_players,
+        "score_state": pd.Categorical(score, SCORE_STATES),
+        "manpower": pd.Categorical(manpower, MANPOWER_STATES),
+        "minute_band": pd.Categorical(minute_band(events["period"], events["minute"]), MINUTE_BANDS),
+    }, index=events.index)
+    state["state_key"] = (state["score_state"].astype(str) + "|" + state["manpower"].astype(str) + "|"
+                          + state["minute_band"].astype(str))
+    return state
+
+
+def mirror_state(state: pd.DataFrame, by: Sequence[str]) -> pd.DataFrame:
+    """The opponent's view of the same events: team / opponent and state labels swapped"""
+    mirrored = state[list(by)].copy()
+    for col in by:
+        if col in ("score_state", "manpower"):
+            mirrored[col] = mirrored[col].cat.rename_categories(lambda c: MIRROR[c]) \
+                .cat.reorder_categories(state[col].cat.categories)
+    return mirrored
+
+
+def state_minutes(events: pd.DataFrame, state: pd.DataFrame, by: Sequence[str] = STATE_DIMENSIONS) -> pd.Series:
+    """Minutes each team spent in each state: the gap to the next event, credited to both teams"""
+    clock = pd.Series(clock_seconds(events["timestamp"]), index=events.index)
+    following = clock.groupby([events["match_id"], events["period"]]).shift(-1)
+    minutes = (following - clock).fillna(0.0).clip(lower=0) / 60
+
+    own = state[list(by)].assign(team_name=events["team_name"].to_numpy(), minutes=minutes.to_numpy())
+    other = mirror_state(state, by).assign(team_name=state["opponent_name"].to_numpy(), minutes=minutes.to_numpy())
+    both = pd.concat([own, other], ignore_index=True)
+    return both.groupby(["team_name"] + list(by), observed=True)["minutes"].sum()
+
+
+def metrics_by_state(events: pd.DataFrame, by: Sequence[str] = STATE_DIMENSIONS) -> pd.DataFrame:
+    """Season metrics of every team per game state, with minutes in the state and per-90 rates.
+
+    Counts "for" group the acting team by its state; counts "against"
+    (and the passes allowed for PPDA) group the opponent's events by the
+    mirrored state, so both sides of a row describe the same minutes.
+    """
+    by = list(by)
+    state = game_state(events)
+    type_name = events["type_name"]
+    x = events["x"]
+    is_pass = type_name == "Pass"
+    shot = type_name == "Shot"
+    duel = type_name == "Duel"
+    tackle = duel & events["duel_type_name"].astype(str).str.contains("Tackle", case=False)
+    # Only tackle duels carry an outcome; "Aerial Lost" has none and aerials won are not Duel events
+    contested = duel & events["duel_outcome_name"].notna()
+    block = (type_name == "Block") & ~events["block_save_block"].astype(str).str.contains("TRUE", case=False)
+    flags = pd.DataFrame({
+        "passes": is_pass,
+        "passes_completed": is_pass & ~events["pass_outcome_name"].isin(PASS_FAILED),
+        "shots": shot,
+        "xg": events["shot_statsbomb_xg"].where(shot, 0.0).fillna(0.0),
+        "goals": shot & (events["shot_outcome_name"] == "Goal"),
+        "duels": contested,
+        "duels_won": contested & events["duel_outcome_name"].isin(DUEL_WON),
+        "pressing_actions": (type_name.isin(PPDA_ACTIONS) | tackle | block) & (x > PPDA_ACTION_MIN_X),
+        "build_up_passes": is_pass & ~events["pass_outcome_name"].isin(PASS_FAILED) & (x < PPDA_PASS_MAX_X),
+    }, index=events.index)
+
+    own = pd.concat([flags, state[by]], axis=1).assign(team_name=events["team_name"])
+    table = own.groupby(["team_name"] + by, observed=True)[list(flags)].sum()
+    against_cols = ["shots", "xg", "goals", "build_up_passes"]
+    mirrored = pd.concat([flags[against_cols], mirror_state(state, by)], axis=1).assign(
+        team_name=state["opponent_name"])
+    against = mirrored.groupby(["team_name"] + by, observed=True)[against_cols].sum()
+
+    table = table.join(against.add_suffix("_against"), how="outer").fillna(0.0)
+    counts = [c for c in table if not c.startswith("xg")]
+    table[counts] = table[counts].astype("int64")
+    table = table.join(state_minutes(events, state, by), how="left")
+    per90 = 90 / table["minutes"].where(table["minutes"] > 0)
+    for col in ("xg", "xg_against", "shots", "passes"):
+        table[f"{col}_per90"] = table[col] * per90
+    table["pass_completion"] = table["passes_completed"] / table["passes"].where(table["passes"] > 0)
+    table["duel_win_rate"] = table["duels_won"] / table["duels"].where(table["duels"] > 0)
+    table["ppda"] = table["build_up_passes_against"] / table["pressing_actions"].where(table["pressing_actions"] > 0)
+    return table.drop(columns="build_up_passes").reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Season metrics split by game state")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--team")
+    parser.add_argument("--by", nargs="+", default=["score_state"], choices=STATE_DIMENSIONS)
+    args = parser.parse_args()
+
+    table = metrics_by_state(load_events(args.event_dir, GAME_STATE_COLUMNS), args.by)
+    if args.team:
+        table = table[table["team_name"] == args.team]
+    columns: List[str] = ["team_name"] + args.by + ["minutes", "xg_per90", "xg_against_per90", "goals",
+                                                     "goals_against", "pass_completion", "duel_win_rate", "ppda"]
+    print(table[columns].round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import os
 import re
 import json
 import numpy as np
+from src.freeze_frames import shot_context, summarize_shot_context
+from src.formation_timeline import build_formation_timeline
 
 def generate_detailed_tactical_summary(df, match_id, team_name):
     summary = {
@@ -135,6 +137,30 @@ def generate_detailed_tactical_summary(df, match_id, team_name):
         if len(formations) > 0:
             summary["formation"] = str(int(float(formations[0])))
 
+    # Formation changes over the match: the shape used longest is the team's formation
+    timeline_cols = ['match_id', 'period', 'timestamp', 'type_name', 'team_name', 'player_id',
+                     'tactics_formation', 'tactics_lineup', 'substitution_replacement_id']
+    if all(col in df.columns for col in timeline_cols):
+        try:
+            timeline = build_formation_timeline(df)
+            timeline = timeline[timeline['team_name'] == team_name]
+            if not timeline.empty:
+                by_formation = timeline.groupby('formation')['minutes'].sum()
+                summary["formation"] = by_formation.idxmax()
+                summary["formation_timeline"] = [
+                    {
+                        "minute": int(row.minute),
+                        "event": row.event,
+                        "formation": row.formation,
+                        "players_on_pitch": int(row.players_on_pitch),
+                        "minutes": round(float(row.minutes), 1),
+                    }
+                    for row in timeline.itertuples()
+                ]
+        except (ValueError, SyntaxError) as e:
+            # Malformed timestamps or tactics_lineup strings in this file
+            print(f"⚠️ Formation timeline skipped: {e}")
+
     # 2. Possession and Buildup Analysis
         # === 2. Possession and Buildup Analysis ===
         possession_analysis = {}
@@ -430,6 +456,8 @@ def generate_detailed_tactical_summary(df, match_id, team_name):
             'shot_types': df['shot_type_name'].dropna().value_counts().to_dict(),
             'shot_outcomes': df['shot_outcome_name'].dropna().value_counts().to_dict()
         }
+        if 'shot_freeze_frame' in df.columns:
+            shot_analysis['freeze_frame_context'] = summarize_shot_context(shot_context(df))
 
 
         if shot_analysis['xG_total'] > 1.5:
@@ -0,0 +1,183 @@
+# Incremental, idempotent updates of the LangChain FAISS index.
+# Every document gets a stable id ({type}:{match_id}:{team}:{player}); a manifest
+# next to the index records each id's content hash, so re-running an ingestion
+# script only embeds new or changed documents and never duplicates old ones.
+import os
+import json
+import hashlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.partitioned_index import field_values
+from src.doc_store import DOCSTORE_FILE, LEGACY_PICKLE, open_doc_store, write_doc_store
+
+MANIFEST_FILE = "manifest.json"
+ID_FIELDS = ("type", "match_id", "team_name", "player_name")
+
+
+def document_id(doc) -> str:
+    parts = []
+    for field in ID_FIELDS:
+        values = sorted(field_values(field, doc.metadata) - {"nan"})
+        parts.append(values[0] if values else "")
+    # Team match rows can miss or share a match_id (reverse fixtures in the CSV);
+    # the date tells them apart. Player profiles carry their Wyscout id instead.
+    for key in ("date", "player_id"):
+        if doc.metadata.get(key):
+            parts.append(str(doc.metadata[key]))
+    return ":".join(parts)
+
+
+def content_hash(doc) -> str:
+    payload = doc.page_content + json.dumps(doc.metadata, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_manifest(index_dir: str) -> Dict[str, str]:
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(index_dir: str, manifest: Dict[str, str]):
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan_sync(documents: Iterable, manifest: Dict[str, str],
+              prune_types: Optional[set] = None) -> Tuple[Dict[str, object], Dict[str, str], List[str]]:
+    """Return (docs to embed by id, their hashes, ids to delete).
+
+    Ids in the manifest whose type is in prune_types but that are no longer
+    produced are deleted; other types belong to other ingestion scripts and
+    are left alone.
+    """
+    wanted: Dict[str, object] = {}
+    for doc in documents:
+        doc_id = document_id(doc)
+        if doc_id in wanted:
+            print(f"⚠️ Duplicate document id {doc_id}, keeping the last one")
+        wanted[doc_id] = doc
+
+    to_embed, hashes = {}, {}
+    for doc_id, doc in wanted.items():
+        digest = content_hash(doc)
+        if manifest.get(doc_id) != digest:
+            to_embed[doc_id] = doc
+            hashes[doc_id] = digest
+
+    stale = [doc_id for doc_id in manifest
+             if doc_id not in wanted and prune_types and doc_id.split(":", 1)[0] in prune_types]
+    changed = [doc_id for doc_id in to_embed if doc_id in manifest]
+    return to_embed, hashes, changed + stale
+
+
+def adopt_legacy_store(store, drop_types: set) -> Dict[str, str]:
+    """Re-key an index built before the manifest with stable ids, in place.
+
+    Vectors of other sources are kept (deduplicated, last copy wins) so they
+    need no re-embedding; documents of drop_types are removed because the
+    caller is about to upsert them.
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    vectors = store.index.reconstruct_n(0, store.index.ntotal)
+    keep: Dict[str, Tuple[int, object]] = {}
+    for row in range(store.index.ntotal):
+        doc = store.docstore.search(store.index_to_docstore_id[row])
+        if doc.metadata.get("type") not in drop_types:
+            keep[document_id(doc)] = (row, doc)
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    if keep:
+        index.add(vectors[[row for row, _ in keep.values()]])
+    print(f"🗂️ Adopted legacy index: kept {len(keep)} of {len(vectors)} vectors")
+    store.index = index
+    store.docstore = InMemoryDocstore({doc_id: doc for doc_id, (_, doc) in keep.items()})
+    store.index_to_docstore_id = dict(enumerate(keep))
+    return {doc_id: content_hash(doc) for doc_id, (_, doc) in keep.items()}
+
+
+def load_store(index_dir: str, embeddings):
+    """LangChain FAISS store rebuilt from index.faiss and docstore.sqlite"""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+
+    docs = open_doc_store(index_dir).all()
+    return FAISS(
+        embeddings,
+        faiss.read_index(os.path.join(index_dir, "index.faiss")),
+        InMemoryDocstore({d.doc_id: Document(page_content=d.page_content, metadata=d.metadata) for d in docs}),
+        {row: d.doc_id for row, d in enumerate(docs)},
+    )
+
+
+def save_store(store, index_dir: str):
+    """Write index.faiss and its row-aligned docstore.sqlite (no pickle)"""
+    import faiss
+
+    index_path = os.path.join(index_dir, "index.faiss")
+    faiss.write_index(store.index, index_path + ".tmp")
+    rows = []
+    for row in range(store.index.ntotal):
+        doc_id = store.index_to_docstore_id[row]
+        doc = store.docstore.search(doc_id)
+        rows.append((doc_id, doc.page_content, doc.metadata))
+    write_doc_store(os.path.join(index_dir, DOCSTORE_FILE), rows)
+    os.replace(index_path + ".tmp", index_path)
+    legacy = os.path.join(index_dir, LEGACY_PICKLE)
+    if os.path.exists(legacy):
+        os.remove(legacy)
+
+
+def sync_documents(documents: List, index_dir: str, embeddings, prune: bool = True):
+    """Upsert documents into the FAISS index at index_dir and delete the ones
+    this source no longer produces (types present in `documents`).
+
+    Returns the vector store, or None when there was nothing to load or build.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    os.makedirs(index_dir, exist_ok=True)
+    prune_types = {doc.metadata.get("type") for doc in documents} if prune else set()
+    manifest = load_manifest(index_dir)
+    store = None
+    if os.path.exists(os.path.join(index_dir, "index.faiss")):
+        store = load_store(index_dir, embeddings)
+        if not manifest:
+            manifest = adopt_legacy_store(store, {doc.metadata.get("type") for doc in documents})
+    else:
+        manifest = {}
+
+    to_embed, hashes, to_delete = plan_sync(documents, manifest, prune_types)
+    print(f"🔄 Index sync: {len(to_embed)} to embed, {len(to_delete)} to delete, "
+          f"{len(documents) - len(to_embed)} unchanged")
+    if store is not None and not to_embed and not to_delete and os.path.exists(
+            os.path.join(index_dir, MANIFEST_FILE)):
+        return store
+
+    if to_delete:
+        store.delete(to_delete)
+        for doc_id in to_delete:
+            manifest.pop(doc_id, None)
+    if to_embed:
+        ids, docs = list(to_embed), list(to_embed.values())
+        if store is None:
+            store = FAISS.from_documents(docs, embeddings, ids=ids)
+        else:
+            store.add_documents(docs, ids=ids)
+        manifest.update(hashes)
+    if store is None:
+        print("⚠️ No documents to index")
+        return None
+
+    save_store(store, index_dir)
+    save_manifest(index_dir, manifest)
+    print(f"✅ FAISS index at {index_dir} holds {store.index.ntotal} vectors")
+    return store
@@ -0,0 +1,245 @@
+# Best-XI selection: squad x formation slots assignment on role-based scores.
+# Each player's quality is their percentile on the key metrics of their
+# clustered role (player_style, Player_Role_Profile.csv); a slot's score is that
+# quality times how naturally the player fits the slot. The top-k XIs per
+# formation come from Hungarian assignment plus Murty's ranking.
+# python -m src.lineup_optimizer "Urawa Reds" [--formations 4231 433] [--k 3]
+import os
+import heapq
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.file_catalog import DATA_DIR, normalize_name
+
+PLAYER_CSV_PATH = os.path.join(DATA_DIR, "J1 2024_players.csv")
+ROLE_PROFILE_PATH = "data/Player_Role_Profile.csv"
+
+# StatsBomb position.id -> abbreviation (same table as generate_team_tactical_summaries)
+POSITION_ABBR = {
+    1: 'GK', 2: 'RB', 3: 'RCB', 4: 'CB', 5: 'LCB', 6: 'LB', 7: 'RWB', 8: 'LWB',
+    9: 'RDM', 10: 'CDM', 11: 'LDM', 12: 'RM', 13: 'RCM', 14: 'CM', 15: 'LCM',
+    16: 'LM', 17: 'RW', 18: 'RAM', 19: 'CAM', 20: 'LAM', 21: 'LW',
+    22: 'RCF', 23: 'ST', 24: 'LCF', 25: 'SS'
+}
+# tactics_formation -> StatsBomb position ids of the XI
+FORMATION_POSITIONS = {
+    "442": [1, 2, 3, 5, 6, 12, 13, 15, 16, 22, 24],
+    "4231": [1, 2, 3, 5, 6, 9, 11, 17, 19, 21, 23],
+    "433": [1, 2, 3, 5, 6, 10, 13, 15, 17, 21, 23],
+    "4411": [1, 2, 3, 5, 6, 12, 13, 15, 16, 19, 23],
+    "4141": [1, 2, 3, 5, 6, 10, 12, 13, 15, 16, 23],
+    "451": [1, 2, 3, 5, 6, 12, 13, 14, 15, 16, 23],
+    "4321": [1, 2, 3, 5, 6, 13, 14, 15, 17, 21, 23],
+    "41212": [1, 2, 3, 5, 6, 10, 13, 15, 19, 22, 24],
+    "4222": [1, 2, 3, 5, 6, 13, 15, 17, 21, 22, 24],
+    "3421": [1, 3, 4, 5, 7, 9, 11, 8, 18, 20, 23],
+    "343": [1, 3, 4, 5, 7, 8, 13, 15, 17, 21, 23],
+    "3511": [1, 3, 4, 5, 7, 10, 8, 13, 15, 19, 23],
+    "352": [1, 3, 4, 5, 7, 8, 13, 14, 15, 22, 24],
+    "3412": [1, 3, 4, 5, 7, 8, 13, 15, 19, 22, 24],
+    "532": [1, 2, 3, 4, 5, 6, 10, 13, 15, 22, 24],
+    "541": [1, 3, 4, 5, 2, 6, 12, 13, 15, 16, 23],
+}
+# Slot -> Wyscout position codes (players CSV) that can fill it, most natural first
+SLOT_ELIGIBILITY = {
+    "GK": ["GK"],
+    "RB": ["RB", "RB5", "RWB"], "LB": ["LB", "LB5", "LWB"],
+    "RWB": ["RWB", "RB5", "RB", "RW"], "LWB": ["LWB", "LB5", "LB", "LW"],
+    "RCB": ["RCB", "RCB3", "CB"], "LCB": ["LCB", "LCB3", "CB"],
+    "CB": ["CB", "RCB3", "LCB3", "RCB", "LCB"],
+    "RDM": ["RDMF", "DMF", "RCMF"], "LDM": ["LDMF", "DMF", "LCMF"], "CDM": ["DMF", "RDMF", "LDMF"],
+    "RCM": ["RCMF", "RCMF3", "RDMF"], "LCM": ["LCMF", "LCMF3", "LDMF"],
+    "CM": ["RCMF3", "LCMF3", "RCMF", "LCMF", "DMF"],
+    "RM": ["RW", "RAMF", "RWF", "RWB"], "LM": ["LW", "LAMF", "LWF", "LWB"],
+    "RW": ["RW", "RWF", "RAMF"], "LW": ["LW", "LWF", "LAMF"],
+    "RAM": ["RAMF", "AMF", "RW"], "LAM": ["LAMF", "AMF", "LW"], "CAM": ["AMF", "RAMF", "LAMF"],
+    "RCF": ["CF", "RWF"], "LCF": ["CF", "LWF"], "ST": ["CF"], "SS": ["AMF", "CF"],
+}
+# Weight of a player's primary / secondary / third listed position
+POSITION_RANK_WEIGHT = [1.0, 0.85, 0.7]
+# Weight of a slot's less natural codes (everything after the first)
+ALTERNATE_CODE_WEIGHT = 0.9
+# Minutes at which a player's metrics count for half their face value
+MINUTES_PRIOR = 450
+# Metrics in the role profiles where lower is better
+LOWER_IS_BETTER = {"Conceded goals per 90", "Conceded goals", "xG against", "xG against per 90"}
+# Cost of an ineligible player in a slot; any XI using one is discarded
+INFEASIBLE = -1e6
+# Assignments popped per formation before giving up on finding k distinct XIs
+MAX_MURTY_EXPANSIONS = 500
+
+
+def load_role_metrics(path: str = ROLE_PROFILE_PATH) -> Dict[str, List[str]]:
+    """Role -> key metric columns from Player_Role_Profile.csv"""
+    profiles = pd.read_csv(path)
+    roles = {}
+    for role, metrics in zip(profiles["Player Role"], profiles["Key Metrics"]):
+        # Metric names may contain ", m" / ", %" themselves
+        parts = [p.strip() for p in str(metrics).split(",")]
+        names = []
+        for part in parts:
+            if part in ("m", "%") and names:
+                names[-1] = f"{names[-1]}, {part}"
+            else:
+                names.append(part)
+        roles[role] = names
+    return roles
+
+
+def role_scores(players: pd.DataFrame, role_metrics: Dict[str, List[str]]) -> np.ndarray:
+    """Percentile of each player on their role's key metrics, within their position group.
+
+    Shrunk towards the league median for players with few minutes.
+    """
+    metrics = sorted({m for names in role_metrics.values() for m in names if m in players.columns})
+    values = players[metrics].apply(pd.to_numeric, errors="coerce")
+    for m in metrics:
+        if m in LOWER_IS_BETTER:
+            values[m] = -values[m]
+    pct = values.groupby(players["position_category"].fillna("")).rank(pct=True).fillna(0.5)
+
+    column = {m: i for i, m in enumerate(metrics)}
+    pct = pct.to_numpy()
+    scores = np.full(len(players), 0.5)
+    for role, names in role_metrics.items():
+        idx = [column[m] for m in names if m in column]
+        rows = (players["player_style"] == role).to_numpy()
+        if idx and rows.any():
+            scores[rows] = pct[np.ix_(rows, idx)].mean(axis=1)
+    minutes = pd.to_numeric(players["Minutes played"], errors="coerce").fillna(0).to_numpy()
+    reliability = minutes / (minutes + MINUTES_PRIOR)
+    return 0.5 + (scores - 0.5) * reliability
+
+
+def slot_fit(players: pd.DataFrame, slots: Sequence[str]) -> np.ndarray:
+    """players x slots positional fit in [0, 1]; 0 = cannot play there"""
+    listed = players["Position"].fillna("").map(lambda s: [p.strip() for p in s.split(",") if p.strip()])
+    fit = np.zeros((len(players), len(slots)))
+    for j, slot in enumerate(slots):
+        codes = SLOT_ELIGIBILITY.get(slot, [])
+        for i, positions in enumerate(listed):
+            best = 0.0
+            for rank, code in enumerate(positions[:len(POSITION_RANK_WEIGHT)]):
+                if code in codes:
+                    weight = 1.0 if code == codes[0] else ALTERNATE_CODE_WEIGHT
+                    best = max(best, POSITION_RANK_WEIGHT[rank] * weight)
+            fit[i, j] = best
+    return fit
+
+
+def _solve(score: np.ndarray, forced: List[Tuple[int, int]], excluded: List[Tuple[int, int]]):
+    """Best assignment of slots (rows) to players (columns) under Murty constraints"""
+    constrained = score.copy()
+    for slot, player in excluded:
+        constrained[slot, player] = INFEASIBLE
+    for slot, player in forced:
+        keep = constrained[slot, player]
+        constrained[slot, :] = INFEASIBLE
+        constrained[:, player] = INFEASIBLE
+        constrained[slot, player] = keep
+    rows, cols = linear_sum_assignment(constrained, maximize=True)
+    total = constrained[rows, cols].sum()
+    if total <= INFEASIBLE / 2:
+        return None
+    return total, cols
+
+
+def top_k_assignments(score: np.ndarray, k: int) -> List[Tuple[float, np.ndarray]]:
+    """k best slot -> player assignments with distinct player sets (Murty's algorithm), best first.
+
+    Interchangeable slots (LCB / RCB, LCF / RCF) give the same XI in another
+    order; such reshuffles are enumerated but only the best one is kept.
+    """
+    first = _solve(score, [], [])
+    if first is None:
+        return []
+    counter = 0
+    heap = [(-first[0], counter, first[1], [], [])]
+    results = []
+    seen = set()
+    expansions = 0
+    while heap and len(results) < k and expansions < MAX_MURTY_EXPANSIONS:
+        neg_total, _, cols, forced, excluded = heapq.heappop(heap)
+        expansions += 1
+        players = frozenset(cols.tolist())
+        if players not in seen:
+            seen.add(players)
+            results.append((-neg_total, cols))
+        # Partition the rest of this node's space: keep slots < i, change slot i
+        for i in range(len(cols)):
+            if (i, cols[i]) in forced:
+                continue
+            child_forced = forced + [(j, cols[j]) for j in range(i) if (j, cols[j]) not in forced]
+            child_excluded = excluded + [(i, cols[i])]
+            solved = _solve(score, child_forced, child_excluded)
+            if solved is not None:
+                counter += 1
+                heapq.heappush(heap, (-solved[0], counter, solved[1], child_forced, child_excluded))
+    return results
+
+
+def load_squad(team_name: str, path: str = PLAYER_CSV_PATH,
+               role_metrics: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+    """A team's players with their role score"""
+    players = pd.read_csv(path).copy()  # consolidate the per-column blocks before adding one
+    role_metrics = role_metrics or load_role_metrics()
+    players["role_score"] = role_scores(players, role_metrics)
+    squad = players[players["Team"].map(normalize_name) == normalize_name(team_name)]
+    return squad.reset_index(drop=True)
+
+
+def best_lineups(squad: pd.DataFrame, formations: Optional[Sequence[str]] = None, k: int = 3) -> List[Dict]:
+    """Top-k XIs for each formation, all formations ranked together by total score"""
+    formations = [str(f) for f in (formations or FORMATION_POSITIONS)]
+    slot_names = sorted({POSITION_ABBR[p] for f in formations for p in FORMATION_POSITIONS[f]})
+    # Every distinct slot is scored once, formations just pick columns
+    fit = slot_fit(squad, slot_names)
+    value = fit * squad["role_score"].to_numpy()[:, None]
+    value[fit == 0] = INFEASIBLE
+    column = {slot: j for j, slot in enumerate(slot_names)}
+    names = squad["Full name"].fillna(squad["Player"]).tolist()
+    roles = squad["player_style"].tolist()
+
+    lineups = []
+    for formation in formations:
+        slots = [POSITION_ABBR[p] for p in FORMATION_POSITIONS[formation]]
+        score = value[:, [column[s] for s in slots]].T
+        for rank, (total, cols) in enumerate(top_k_assignments(score, k), 1):
+            lineups.append({
+                "formation": formation,
+                "rank": rank,
+                "score": round(float(total), 3),
+                "lineup": [
+                    {"slot": slot, "player": names[c], "role": roles[c], "score": round(float(score[s, c]), 3)}
+                    for s, (slot, c) in enumerate(zip(slots, cols))
+                ],
+            })
+    lineups.sort(key=lambda l: -l["score"])
+    return lineups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Best XIs for a team across formations")
+    parser.add_argument("team")
+    parser.add_argument("--formations", nargs="+", choices=list(FORMATION_POSITIONS))
+    parser.add_argument("--k", type=int, default=3, help="lineups per formation")
+    parser.add_argument("--show", type=int, default=3, help="lineups to print")
+    args = parser.parse_args()
+
+    squad = load_squad(args.team)
+    if squad.empty:
+        raise SystemExit(f"❌ No players for {args.team} in {PLAYER_CSV_PATH}")
+    lineups = best_lineups(squad, args.formations, args.k)
+    if not lineups:
+        raise SystemExit(f"❌ {args.team}'s squad cannot fill any of the formations")
+    for lineup in lineups[:args.show]:
+        print(f"\n📋 {lineup['formation']} #{lineup['rank']} (score {lineup['score']})")
+        for slot in lineup["lineup"]:
+            print(f"  {slot['slot']:>4}  {slot['player']} ({slot['role']}, {slot['score']})")
+
+
+if __name__ == "__main__":
+    main()
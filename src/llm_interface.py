@@ -1,31 +1,151 @@
-from openai import OpenAI
+import os
+import time
+from typing import Dict, Iterator, List
 import streamlit as st
+from src.answer_cache import AnswerCache, make_key
+from src.async_llm import LLM_BASE_URL, AsyncLLMClient, BackgroundLoop
+from src.prompt_builder import QUESTION_MARKER
 
-# Use Streamlit secret
-api_key = st.secrets["OPENAI_API_KEY"]
+MODEL_NAME = "gpt-4o-mini-2024-07-18"
+# "openai" or "local" (offline stand-in, no network or API key needed)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LOCAL_TOKEN_DELAY = float(os.getenv("LOCAL_LLM_TOKEN_DELAY", "0.02"))
 
-client = OpenAI(api_key=api_key)
+SYSTEM_PROMPT = (
+    "You are a professional football tactics analyst. "
+    "Based on the match data provided, respond with a clear, confident, and structured analysis. "
+    "Avoid speculation or personal phrases like 'I think' or 'maybe'. "
+    "Explain what happened in clear tactical terms using the stats, summaries, and patterns. "
+    "If multiple matches are shown, identify common patterns and explain how to beat or emulate the team."
+)
+ERROR_MESSAGE = "Sorry, there was an error generating the response."
 
 
+def build_messages(prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
-def generate_answer(prompt: str, max_tokens: int = 3000) -> str:
+
+def get_api_key() -> str:
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": (
-                    "You are a professional football tactics analyst. "
-                    "Based on the match data provided, respond with a clear, confident, and structured analysis. "
-                    "Avoid speculation or personal phrases like 'I think' or 'maybe'. "
-                    "Explain what happened in clear tactical terms using the stats, summaries, and patterns. "
-                    "If multiple matches are shown, identify common patterns and explain how to beat or emulate the team."
-                )},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.7,
+        return st.secrets["OPENAI_API_KEY"]
+    except Exception:
+        pass
+    if LLM_BASE_URL and "OPENAI_API_KEY" not in os.environ:
+        return "unused"  # local OpenAI-compatible endpoints ignore the key
+    return os.environ["OPENAI_API_KEY"]
+
+
+class OpenAIBackend:
+    """Chat completions through one AsyncLLMClient running on a background loop.
+
+    Every Streamlit session shares its connection pool, concurrency limit,
+    retries and latency stats.
+    """
+
+    def __init__(self, model: str = MODEL_NAME):
+        self.model = model
+        self.loop = BackgroundLoop()
+        self.client = AsyncLLMClient(model, get_api_key())
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        return self.loop.run(self.client.complete(messages, max_tokens, temperature))
+
+    def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> Iterator[str]:
+        return self.loop.iterate(self.client.stream(messages, max_tokens, temperature))
+
+
+class LocalBackend:
+    """Offline stand-in that streams a canned answer word by word"""
+
+    def __init__(self, model: str = "local-echo", token_delay: float = LOCAL_TOKEN_DELAY):
+        self.model = model
+        self.token_delay = token_delay
+
+    def _answer(self, messages: List[Dict[str, str]]) -> str:
+        prompt = messages[-1]["content"]
+        question = prompt.rsplit("Question:", 1)[-1].strip()
+        return (
+            f"Local backend answer for: {question}\n\n"
+            f"The prompt carried {len(prompt)} characters of context. "
+            "Set LLM_BACKEND=openai to get a real tactical analysis."
         )
-        return response.choices[0].message.content.strip()
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        return self._answer(messages)
+
+    def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> Iterator[str]:
+        for i, word in enumerate(self._answer(messages).split(" ")):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "local": LocalBackend,
+}
+
+
+@st.cache_resource
+def get_backend(name: str = LLM_BACKEND):
+    """One backend (and HTTP client) per process"""
+    return BACKENDS[name]()
+
+
+def llm_stats() -> Dict:
+    backend = get_backend()
+    return backend.client.stats.summary() if hasattr(backend, "client") else {}
+
+
+def generate_answer(prompt: str, max_tokens: int = 3000) -> str:
+    try:
+        return get_backend().complete(build_messages(prompt), max_tokens, 0.7).strip()
+    except Exception as e:
+        print("❌ Error:", e)
+        return ERROR_MESSAGE
+
+
+def _backend_tokens(prompt: str, max_tokens: int) -> Iterator[str]:
+    """Answer text as it arrives from the backend; backend errors propagate"""
+    start = time.perf_counter()
+    first_token = None
+    for token in get_backend().stream(build_messages(prompt), max_tokens, 0.7):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+            print(f"⏱️ First token after {first_token:.2f}s")
+        yield token
+
+
+def stream_answer(prompt: str, max_tokens: int = 3000) -> Iterator[str]:
+    """Yield answer text as it arrives from the backend"""
+    try:
+        yield from _backend_tokens(prompt, max_tokens)
+    except Exception as e:
+        print("❌ Error:", e)
+        yield ERROR_MESSAGE
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache()
+
+
+def stream_answer_cached(prompt: str, question: str, loaded_files: List[str], max_tokens: int = 3000) -> Iterator[str]:
+    """stream_answer behind the persistent answer cache.
+
+    The key covers the model, system prompt, packed context and normalized
+    question; entries are dropped when any of loaded_files changes. A
+    backend failure, even after some text has streamed, ends the answer
+    with ERROR_MESSAGE and nothing is stored.
+    """
+    model = get_backend().model
+    context = prompt.rsplit(QUESTION_MARKER, 1)[0]
+    key = make_key(model, SYSTEM_PROMPT, context, question)
+    try:
+        yield from get_answer_cache().stream(key, model, question, loaded_files, _backend_tokens(prompt, max_tokens))
     except Exception as e:
         print("❌ Error:", e)
-        return "Sorry, there was an error generating the response."
+        yield ERROR_MESSAGE
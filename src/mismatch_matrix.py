@@ -0,0 +1,234 @@
+# Team-vs-team mismatch matrix for the whole league.
+# Season averages from the team table plus per-match team summaries are
+# standardized once; every (team, opponent) pair is then scored on each
+# strength-vs-weakness pairing with one broadcast and cached to disk.
+# python -m src.mismatch_matrix "Urawa Reds" "Kashima Antlers"
+import os
+import glob
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from src.file_catalog import DATA_DIR, normalize_name, parse_catalog_filename, same_team
+
+TEAM_TABLE_PATH = "data/J1 2024_teams.csv"
+MISMATCH_CACHE_DIR = os.getenv("MISMATCH_CACHE_DIR", "data/cache/mismatch")
+# Bump when features or pairings change so cached matrices are rebuilt
+MISMATCH_VERSION = 2
+# Team summary JSON field -> feature name
+SUMMARY_FEATURES = {
+    ("attack", "box_entries"): "box_entries",
+    ("special_plays", "crosses_total"): "crosses_total",
+    ("carries", "into_final_third"): "carries_into_final_third",
+    ("possession", "progressive_passes_total"): "progressive_passes",
+    ("movement", "counterpress_actions"): "counterpress_actions",
+    ("movement", "avg_intensity_m_per_min"): "intensity_m_per_min",
+}
+# (team feature, sign, opponent feature, sign, description): a high signed
+# team value meeting a high signed opponent value favours the team
+MISMATCH_PAIRS = [
+    ("Open Play xG", 1, "Open Play xGA", 1, "open-play chance creation vs open-play chances conceded"),
+    ("Set Piece xG", 1, "Set Piece xGA", 1, "set-piece threat vs set-piece defending"),
+    ("xT", 1, "xT Against", 1, "ball progression vs threat allowed"),
+    ("Passes into Box", 1, "Shots Faced", 1, "box service vs shots conceded"),
+    ("PPDA", -1, "High Recoveries Against", 1, "pressing intensity vs build-up security"),
+    ("High Recoveries", 1, "Possession", 1, "high regains vs possession exposed to the press"),
+    ("carries_into_final_third", 1, "PPDA", 1, "ball carrying vs passive pressing"),
+    ("counterpress_actions", 1, "High Recoveries Against", 1, "counter-pressing vs loose possession"),
+    ("crosses_total", 1, "Shots Faced", 1, "crossing volume vs shots conceded"),
+    ("Field Tilt", 1, "Field Tilt", -1, "territorial dominance"),
+    ("intensity_m_per_min", 1, "intensity_m_per_min", -1, "running intensity"),
+]
+
+
+def match_team_name(team: str, names: List[str]) -> Optional[str]:
+    """The name in names that refers to team: an exact match, else the only loose match"""
+    key = normalize_name(team)
+    exact = [n for n in names if normalize_name(n) == key]
+    if exact:
+        return exact[0]
+    # "Tokyo" loosely matches "Tokyo Verdy" too, so ambiguous matches are refused
+    loose = [n for n in names if same_team(team, n)]
+    return loose[0] if len(loose) == 1 else None
+
+
+def load_team_features(team_table: str = TEAM_TABLE_PATH, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """Season-average features per team (index: team name)"""
+    table = pd.read_csv(team_table)
+    numeric = table.drop(columns=["Team"]).apply(pd.to_numeric, errors="coerce")
+    features = numeric.groupby(table["Team"]).mean().dropna(axis=1, how="all")
+
+    rows = []
+    for path in glob.glob(os.path.join(data_dir, "match_*__team_*_summary.json")):
+        parsed = parse_catalog_filename(os.path.basename(path))
+        if not parsed or not parsed["team"]:
+            continue
+        with open(path, encoding="utf-8") as f:
+            analysis = json.load(f).get("detailed_tactical_analysis", {})
+        row = {"team": parsed["team"]}
+        for (section, field), name in SUMMARY_FEATURES.items():
+            row[name] = analysis.get(section, {}).get(field)
+        rows.append(row)
+    if rows:
+        summaries = pd.DataFrame(rows)
+        summaries[list(SUMMARY_FEATURES.values())] = summaries[list(SUMMARY_FEATURES.values())].apply(
+            pd.to_numeric, errors="coerce")
+        summary_means = summaries.groupby("team").mean(numeric_only=True)
+        names = list(summary_means.index)
+        keys = [match_team_name(team, names) for team in features.index]
+        unmatched = [team for team, key in zip(features.index, keys) if key is None]
+        if unmatched:
+            print(f"⚠️ No team summaries for {', '.join(unmatched)}; their summary features are left out")
+        aligned = summary_means.reindex(keys)
+        features = pd.concat([features, aligned.set_axis(features.index)], axis=1)
+    for name in SUMMARY_FEATURES.values():
+        if name not in features:
+            features[name] = np.nan
+    return features
+
+
+def standardize(features: pd.DataFrame) -> pd.DataFrame:
+    """Column z-scores; a feature a team has no data for stays NaN so its pairings are skipped"""
+    return (features - features.mean()) / features.std(ddof=0).replace(0, np.nan)
+
+
+class MismatchMatrix:
+    """pair_scores[i, j, p]: how much team i's strength p exploits team j's weakness p"""
+
+    def __init__(self, teams: List[str], pair_scores: np.ndarray):
+        self.teams = list(teams)
+        self.pair_scores = pair_scores
+        self._row = {normalize_name(t): i for i, t in enumerate(self.teams)}
+
+    @classmethod
+    def from_features(cls, z: pd.DataFrame) -> "MismatchMatrix":
+        attack = np.stack([sign * z[col].to_numpy() for col, sign, _, _, _ in MISMATCH_PAIRS], axis=1)
+        defence = np.stack([sign * z[col].to_numpy() for _, _, col, sign, _ in MISMATCH_PAIRS], axis=1)
+        # (teams, 1, pairs) + (1, opponents, pairs): every matchup at once
+        pair_scores = (attack[:, None, :] + defence[None, :, :]) / 2
+        return cls(list(z.index), pair_scores)
+
+    @property
+    def edge(self) -> np.ndarray:
+        """Net advantage of team i over team j: its mismatches minus the reverse ones"""
+        mean = np.nanmean(self.pair_scores, axis=2)
+        return mean - mean.T
+
+    def index(self, team: str) -> int:
+        key = normalize_name(team)
+        if key not in self._row:
+            raise KeyError(f"Unknown team: {team}")
+        return self._row[key]
+
+    def how_to_beat(self, team: str, opponent: str, top: int = 3) -> List[Dict]:
+        """The team's biggest edges against the opponent, strongest first"""
+        scores = self.pair_scores[self.index(team), self.index(opponent)]
+        # Pairings without data for either team are skipped
+        order = [p for p in np.argsort(-scores) if not np.isnan(scores[p])][:top]
+        return [{"mismatch": MISMATCH_PAIRS[p][4], "score": round(float(scores[p]), 2)} for p in order]
+
+    def summary(self, team: str, opponent: str, top: int = 3) -> str:
+        """Text block for prompts: edges both ways and the net balance"""
+        i, j = self.index(team), self.index(opponent)
+        lines = [f"[Mismatch analysis: {self.teams[i]} vs {self.teams[j]}] (z-scores vs league average)"]
+        for attacker, defender in ((self.teams[i], self.teams[j]), (self.teams[j], self.teams[i])):
+            edges = ", ".join(f"{e['mismatch']} ({e['score']:+.2f})"
+                              for e in self.how_to_beat(attacker, defender, top)) or "n/a"
+            lines.append(f"- {attacker} edges: {edges}")
+        lines.append(f"- Net balance for {self.teams[i]}: {self.edge[i, j]:+.2f}")
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        np.savez_compressed(path, teams=np.array(self.teams), pair_scores=self.pair_scores)
+
+    @classmethod
+    def load(cls, path: str) -> "MismatchMatrix":
+        with np.load(path) as data:
+            return cls(data["teams"].tolist(), data["pair_scores"])
+
+
+def source_fingerprint(team_table: str, data_dir: str) -> Dict:
+    summaries = sorted(glob.glob(os.path.join(data_dir, "match_*__team_*_summary.json")))
+    return {
+        "version": MISMATCH_VERSION,
+        "files": [[os.path.basename(p), os.path.getsize(p), int(os.path.getmtime(p))]
+                  for p in [team_table] + summaries],
+    }
+
+
+def load_mismatch_matrix(team_table: str = TEAM_TABLE_PATH, data_dir: str = DATA_DIR,
+                         rebuild: bool = False, cache_dir: str = MISMATCH_CACHE_DIR) -> MismatchMatrix:
+    """All-pairs mismatch matrix, from the disk cache unless its sources changed"""
+    path = os.path.join(cache_dir, "mismatch.npz")
+    meta_path = os.path.join(cache_dir, "mismatch.json")
+    fingerprint = source_fingerprint(team_table, data_dir)
+    if not rebuild and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            if json.load(f) == fingerprint:
+                return MismatchMatrix.load(path)
+
+    matrix = MismatchMatrix.from_features(standardize(load_team_features(team_table, data_dir)))
+    os.makedirs(cache_dir, exist_ok=True)
+    matrix.save(path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(fingerprint, f)
+    print(f"⚔️ Built mismatch matrix for {len(matrix.teams)} teams x {len(MISMATCH_PAIRS)} pairings")
+    return matrix
+
+
+_MATRIX: Optional[MismatchMatrix] = None
+_MATRIX_SIGNATURE = None
+
+
+def _matrix_signature(team_table: str = TEAM_TABLE_PATH, data_dir: str = DATA_DIR,
+                      cache_dir: str = MISMATCH_CACHE_DIR):
+    # Summaries added or regenerated, a new season table or a rebuilt cache all bump an mtime
+    signature = []
+    for path in (data_dir, team_table, os.path.join(cache_dir, "mismatch.npz")):
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_mismatch_matrix() -> MismatchMatrix:
+    """Process-wide matrix, reloaded when its sources or cache file changed"""
+    global _MATRIX, _MATRIX_SIGNATURE
+    signature = _matrix_signature()
+    if _MATRIX is None or signature != _MATRIX_SIGNATURE:
+        _MATRIX = load_mismatch_matrix()
+        _MATRIX_SIGNATURE = _matrix_signature()
+    return _MATRIX
+
+
+def mismatch_summary(team: str, opponent: str) -> Optional[str]:
+    """Prompt-ready mismatch text for a fixture, or None if either team is unknown"""
+    try:
+        matrix = get_mismatch_matrix()
+    except OSError as e:
+        print(f"⚠️ Mismatch matrix unavailable: {e}")
+        return None
+    try:
+        return matrix.summary(team, opponent)
+    except KeyError as e:
+        print(f"⚠️ No mismatch analysis for {team} vs {opponent}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Team-vs-team mismatches")
+    parser.add_argument("team")
+    parser.add_argument("opponent")
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    matrix = load_mismatch_matrix(rebuild=args.rebuild)
+    print(matrix.summary(args.team, args.opponent, args.top))
+
+
+if __name__ == "__main__":
+    main()
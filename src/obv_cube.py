@@ -0,0 +1,154 @@
+# Season OBV cube: on-ball value summed per
+# player x match x action type x pitch zone x game state, stored as one small
+# Parquet file so roll-ups never rescan the match event files.
+# python -m src.obv_cube --team "Urawa Reds" [--by player_name type_name] [--rebuild]
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from src.pass_graph import EVENT_DATA_DIR
+from src.expected_threat import cell_index, load_events, source_fingerprint
+from src.game_state import score_state
+
+OBV_CUBE_DIR = os.getenv("OBV_CUBE_DIR", "data/cache/obv")
+OBV_CUBE_FILE = "obv_cube.parquet"
+# Bump when the cube layout changes so cached cubes are rebuilt
+OBV_CUBE_VERSION = 1
+# Coarse zones: pitch thirds along the length x left / centre / right lanes
+ZONE_GRID = (3, 3)
+ZONE_THIRDS = ["defensive third", "middle third", "final third"]
+ZONE_LANES = ["left", "centre", "right"]
+OBV_MEASURES = ["obv_for_net", "obv_against_net", "obv_total_net"]
+CUBE_DIMENSIONS = ["match_id", "team_name", "player_id", "player_name", "type_name", "zone", "game_state"]
+OBV_COLUMNS = ["index", "match_id", "type_name", "team_name", "player_id", "player_name", "x", "y",
+               "Shoter_x", "Shoter_y", "shot_outcome_name"] + OBV_MEASURES
+
+
+def zone_label(zone: int) -> str:
+    length, _ = ZONE_GRID
+    if zone < 0:
+        return "unknown"
+    return f"{ZONE_THIRDS[zone % length]}, {ZONE_LANES[zone // length]}"
+
+
+def build_obv_cube(events: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate event-level OBV into the cube (one row per non-empty cell)"""
+    state = score_state(events)
+    valued = events["obv_total_net"].notna().to_numpy()
+    rows = events[valued]
+    x = rows["x"].fillna(rows["Shoter_x"])
+    y = rows["y"].fillna(rows["Shoter_y"])
+    cells = pd.DataFrame({
+        "match_id": rows["match_id"].to_numpy("int64"),
+        "team_name": rows["team_name"].to_numpy(),
+        "player_id": rows["player_id"].to_numpy("int64"),
+        "player_name": rows["player_name"].to_numpy(),
+        "type_name": rows["type_name"].to_numpy(),
+        "zone": cell_index(x, y, ZONE_GRID),
+        "game_state": state[valued],
+        **{m: rows[m].to_numpy("float64") for m in OBV_MEASURES},
+    })
+    cube = cells.groupby(CUBE_DIMENSIONS, sort=False, observed=True).agg(
+        actions=("obv_total_net", "size"), **{m: (m, "sum") for m in OBV_MEASURES}
+    ).reset_index()
+    return compact(cube)
+
+
+def compact(cube: pd.DataFrame) -> pd.DataFrame:
+    """Dictionary-encode the string dimensions and narrow the numeric ones"""
+    for col in ("team_name", "player_name", "type_name", "game_state"):
+        cube[col] = cube[col].astype("category")
+    cube["match_id"] = cube["match_id"].astype("int32")
+    cube["player_id"] = cube["player_id"].astype("int32")
+    cube["zone"] = cube["zone"].astype("int8")
+    cube["actions"] = cube["actions"].astype("int32")
+    for m in OBV_MEASURES:
+        cube[m] = cube[m].astype("float32")
+    return cube
+
+
+class ObvCube:
+    """Roll-ups over the precomputed cube.
+
+    query() groups by any subset of CUBE_DIMENSIONS (plus "third" / "lane"
+    derived from the zone) after filtering on any of them; a filter value
+    may be a scalar or a list.
+    """
+
+    def __init__(self, cube: pd.DataFrame):
+        self.cube = cube
+
+    @classmethod
+    def load(cls, event_dir: str = EVENT_DATA_DIR, rebuild: bool = False,
+             cube_dir: str = OBV_CUBE_DIR) -> "ObvCube":
+        """Cube for the event store, rebuilt only when the event files changed"""
+        path = os.path.join(cube_dir, OBV_CUBE_FILE)
+        meta_path = path + ".json"
+        fingerprint = {"version": OBV_CUBE_VERSION, "event_dir": os.path.abspath(event_dir),
+                       "files": source_fingerprint(event_dir)}
+        if not rebuild and os.path.exists(path) and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                if json.load(f) == fingerprint:
+                    return cls(pd.read_parquet(path))
+
+        if not fingerprint["files"]:
+            raise FileNotFoundError(f"No match_*_.csv event files in {event_dir}")
+        events = load_events(event_dir, OBV_COLUMNS)
+        cube = build_obv_cube(events)
+        os.makedirs(cube_dir, exist_ok=True)
+        cube.to_parquet(path, index=False, compression="zstd")
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f)
+        print(f"🧊 Built OBV cube: {len(events)} events -> {len(cube)} cells ({os.path.getsize(path) / 1024:.0f} KB)")
+        return cls(cube)
+
+    def _with_zone_parts(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        length, _ = ZONE_GRID
+        zone = df["zone"].to_numpy()
+        located = zone >= 0  # -1: event without a location
+        if "third" in columns:
+            df = df.assign(third=pd.Categorical.from_codes(np.where(located, zone % length, -1), ZONE_THIRDS))
+        if "lane" in columns:
+            df = df.assign(lane=pd.Categorical.from_codes(np.where(located, zone // length, -1), ZONE_LANES))
+        return df
+
+    def query(self, by: List[str], **filters) -> pd.DataFrame:
+        """Summed OBV and action counts per group, with OBV per action"""
+        df = self._with_zone_parts(self.cube, list(by) + list(filters))
+        mask = np.ones(len(df), dtype=bool)
+        for field, allowed in filters.items():
+            if allowed is None:
+                continue
+            allowed = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+            mask &= df[field].isin(list(allowed)).to_numpy()
+        grouped = df[mask].groupby(list(by), observed=True)[["actions"] + OBV_MEASURES].sum()
+        grouped["obv_per_action"] = grouped["obv_total_net"] / grouped["actions"].where(grouped["actions"] > 0)
+        return grouped.sort_values("obv_total_net", ascending=False).reset_index()
+
+    def value_drivers(self, team_name: str, n: int = 10, match_ids: Optional[List[int]] = None) -> pd.DataFrame:
+        """Players of a team ranked by total OBV added"""
+        return self.query(["player_id", "player_name"], team_name=team_name, match_id=match_ids).head(n)
+
+    def player_profile(self, player_name: str) -> Dict[str, pd.DataFrame]:
+        """OBV of one player split by action type, third and game state"""
+        return {dim: self.query([dim], player_name=player_name) for dim in ("type_name", "third", "game_state")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up the season OBV cube")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--team")
+    parser.add_argument("--by", nargs="+", default=["player_name"])
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cube = ObvCube.load(args.event_dir, rebuild=args.rebuild)
+    print(cube.query(args.by, team_name=args.team).head(args.top).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
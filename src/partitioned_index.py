@@ -0,0 +1,126 @@
+# Metadata-partitioned view over the flat FAISS store.
+# One exact sub-index per document type plus posting lists for team / player /
+# match, so filtered queries only touch the vectors that can match.
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from src.file_catalog import normalize_name
+
+PARTITION_KEY = "type"
+# Filter field -> metadata keys that carry it (the chunk builders disagree)
+FIELD_ALIASES = {
+    "type": ("type",),
+    "match_id": ("match_id",),
+    "team_name": ("team_name", "team"),
+    "player_name": ("player_name", "name"),
+}
+
+
+def normalize_field_value(field: str, value) -> str:
+    if field == "match_id":
+        return str(value).split(".")[0]
+    if field in ("team_name", "player_name"):
+        return normalize_name(value)
+    return str(value)
+
+
+def field_values(field: str, metadata: Dict) -> set:
+    return {
+        normalize_field_value(field, metadata[key])
+        for key in FIELD_ALIASES.get(field, (field,))
+        if metadata.get(key) not in (None, "")
+    }
+
+
+class PartitionedIndex:
+    """Per-type exact FAISS sub-indexes behind one search API.
+
+    Filters map a field (see FIELD_ALIASES) to one value or a list of values.
+    A "type" filter selects partitions; the other fields are resolved to row
+    ids through posting lists and applied as an id selector inside each
+    partition, so no filtered-out vector is ever scored.
+    """
+
+    def __init__(self, vectors: np.ndarray, metadatas: List[Dict], partition_key: str = PARTITION_KEY):
+        import faiss
+        self.partition_key = partition_key
+        self.dim = vectors.shape[1]
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+
+        self.postings: Dict[Tuple[str, str], np.ndarray] = {}
+        lists: Dict[Tuple[str, str], List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            for field in FIELD_ALIASES:
+                for value in field_values(field, metadata):
+                    lists.setdefault((field, value), []).append(row)
+        for key, rows in lists.items():
+            self.postings[key] = np.asarray(rows, dtype="int64")
+
+        # partition -> (sub-index, global row id of each local vector)
+        self.partitions: Dict[str, Tuple[object, np.ndarray]] = {}
+        for (field, value), rows in self.postings.items():
+            if field != partition_key:
+                continue
+            index = faiss.IndexFlatL2(self.dim)
+            index.add(vectors[rows])
+            self.partitions[value] = (index, rows)
+        print(f"🗂️ Partitioned {len(metadatas)} vectors into {len(self.partitions)} {partition_key} partitions")
+
+    @classmethod
+    def from_faiss(cls, index, metadatas: List[Dict], partition_key: str = PARTITION_KEY) -> "PartitionedIndex":
+        """Build from a flat FAISS index and the row-aligned metadata"""
+        return cls(index.reconstruct_n(0, index.ntotal), metadatas, partition_key)
+
+    def _rows_for(self, field: str, allowed) -> np.ndarray:
+        if not isinstance(allowed, (list, tuple, set)):
+            allowed = [allowed]
+        arrays = [self.postings.get((field, normalize_field_value(field, v)), np.empty(0, "int64"))
+                  for v in allowed if v is not None]
+        return np.unique(np.concatenate(arrays)) if arrays else np.empty(0, "int64")
+
+    def candidate_rows(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """Sorted row ids allowed by the non-partition filters (None = no restriction)"""
+        rows = None
+        for field, allowed in (filters or {}).items():
+            if field == self.partition_key:
+                continue
+            field_rows = self._rows_for(field, allowed)
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows, assume_unique=True)
+        return rows
+
+    def allowed_rows(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """All row ids satisfying filters, partition key included (None = everything)"""
+        rows = self.candidate_rows(filters)
+        if filters and self.partition_key in filters:
+            typed = self._rows_for(self.partition_key, filters[self.partition_key])
+            rows = typed if rows is None else np.intersect1d(rows, typed, assume_unique=True)
+        return rows
+
+    def search(self, vector, k: int, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """(row, L2 distance) of the k nearest allowed vectors"""
+        import faiss
+        query = np.asarray(vector, dtype="float32").reshape(1, -1)
+        filters = filters or {}
+        if self.partition_key in filters:
+            wanted = filters[self.partition_key]
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            names = [str(w) for w in wanted if str(w) in self.partitions]
+        else:
+            names = list(self.partitions)
+        allowed = self.candidate_rows(filters)
+        if allowed is not None and len(allowed) == 0:
+            return []
+
+        hits = []
+        for name in names:
+            index, rows = self.partitions[name]
+            params = None
+            if allowed is not None:
+                local = np.nonzero(np.isin(rows, allowed, assume_unique=True))[0]
+                if len(local) == 0:
+                    continue
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(local))
+            n = min(k, index.ntotal)
+            scores, local_ids = index.search(query, n, params=params)
+            hits += [(float(s), int(rows[i])) for s, i in zip(scores[0], local_ids[0]) if i >= 0]
+        hits.sort()
+        return [(row, score) for score, row in hits[:k]]
@@ -0,0 +1,248 @@
+# Sparse pass networks over any set of matches.
+# Player ids are mapped to dense indices once; a team's network for one match
+# or a whole season is a single bincount into a passer x receiver CSR matrix.
+# python -m src.pass_graph "Urawa Reds" [--matches 3925226 3925230]
+import os
+import glob
+import heapq
+import argparse
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, Iterable, List, Optional
+
+EVENT_DATA_DIR = os.getenv("EVENT_DATA_DIR", "Stat")
+EVENT_COLUMNS = ["match_id", "type_name", "team_name", "player_id", "player_name", "pass_recipient_id"]
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOL = 1e-10
+PAGERANK_MAX_ITER = 200
+
+
+class PassGraph:
+    """Directed, weighted pass network: matrix[i, j] = passes from player i to player j"""
+
+    def __init__(self, player_ids: np.ndarray, matrix: sparse.csr_matrix, names: Optional[Dict[int, str]] = None):
+        self.player_ids = np.asarray(player_ids, dtype="int64")
+        self.matrix = matrix.tocsr()
+        self.names = names or {}
+
+    @classmethod
+    def from_passes(cls, passers, receivers, names: Optional[Dict[int, str]] = None) -> "PassGraph":
+        """Build from parallel arrays of passer / receiver player ids (one entry per pass)"""
+        passers = np.asarray(passers, dtype="int64")
+        receivers = np.asarray(receivers, dtype="int64")
+        player_ids, codes = np.unique(np.concatenate([passers, receivers]), return_inverse=True)
+        return cls.from_codes(player_ids, codes[:len(passers)], codes[len(passers):], names)
+
+    @classmethod
+    def from_codes(cls, player_ids: np.ndarray, passer: np.ndarray, receiver: np.ndarray,
+                   names: Optional[Dict[int, str]] = None) -> "PassGraph":
+        """Build from dense player indices into player_ids, keeping only players that appear"""
+        used = np.unique(np.concatenate([passer, receiver]))
+        n = len(used)
+        rows, cols = np.searchsorted(used, passer), np.searchsorted(used, receiver)
+        counts = np.bincount(rows * n + cols, minlength=n * n)
+        edges = np.nonzero(counts)[0]
+        matrix = sparse.csr_matrix((counts[edges].astype("float64"), (edges // n, edges % n)), shape=(n, n))
+        return cls(np.asarray(player_ids)[used], matrix, names)
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    @property
+    def n_passes(self) -> int:
+        return int(self.matrix.sum())
+
+    def pairs(self) -> pd.DataFrame:
+        """Passes between each unordered pair of players (pos_min, pos_max, pass_count)"""
+        # M + M.T counts self-passes twice; take the diagonal back out once
+        symmetric = self.matrix + self.matrix.T - sparse.diags(self.matrix.diagonal())
+        upper = sparse.triu(symmetric).tocoo()
+        upper.eliminate_zeros()
+        ids_a, ids_b = self.player_ids[upper.row], self.player_ids[upper.col]
+        return pd.DataFrame({
+            "pos_min": np.minimum(ids_a, ids_b),
+            "pos_max": np.maximum(ids_a, ids_b),
+            "pass_count": upper.data.astype("int64"),
+        }).sort_values(["pos_min", "pos_max"], ignore_index=True)
+
+    def degree(self) -> Dict[str, np.ndarray]:
+        """Passes made / received and number of distinct partners each way"""
+        binary = self.matrix.astype(bool)
+        return {
+            "passes_made": np.asarray(self.matrix.sum(axis=1)).ravel(),
+            "passes_received": np.asarray(self.matrix.sum(axis=0)).ravel(),
+            "out_degree": np.diff(self.matrix.indptr),
+            "in_degree": np.asarray(binary.sum(axis=0)).ravel(),
+        }
+
+    def pagerank(self, damping: float = PAGERANK_DAMPING, tol: float = PAGERANK_TOL,
+                 max_iter: int = PAGERANK_MAX_ITER) -> np.ndarray:
+        """Weighted PageRank by power iteration; players who never pass spread their rank evenly"""
+        n = len(self)
+        if n == 0:
+            return np.empty(0)
+        out = np.asarray(self.matrix.sum(axis=1)).ravel()
+        inv_out = np.divide(1.0, out, out=np.zeros(n), where=out > 0)
+        transition = sparse.diags(inv_out) @ self.matrix
+        dangling = out == 0
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            new = damping * (transition.T @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+            if np.abs(new - rank).sum() < tol:
+                return new
+            rank = new
+        return rank
+
+    def betweenness(self) -> np.ndarray:
+        """Brandes betweenness on shortest paths where an edge's length is 1 / passes.
+
+        Normalized by (n - 1)(n - 2), the number of ordered pairs that can
+        route through a player.
+        """
+        n = len(self)
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        lengths = 1.0 / self.matrix.data
+        centrality = np.zeros(n)
+        for source in range(n):
+            dist = np.full(n, np.inf)
+            sigma = np.zeros(n)
+            preds: List[List[int]] = [[] for _ in range(n)]
+            order = []
+            dist[source], sigma[source] = 0.0, 1.0
+            heap = [(0.0, source)]
+            done = np.zeros(n, dtype=bool)
+            while heap:
+                d, v = heapq.heappop(heap)
+                if done[v]:
+                    continue
+                done[v] = True
+                order.append(v)
+                for e in range(indptr[v], indptr[v + 1]):
+                    w, alt = indices[e], d + lengths[e]
+                    if alt < dist[w] - 1e-12:
+                        dist[w], sigma[w], preds[w] = alt, sigma[v], [v]
+                        heapq.heappush(heap, (alt, w))
+                    elif abs(alt - dist[w]) <= 1e-12 and not done[w]:
+                        sigma[w] += sigma[v]
+                        preds[w].append(v)
+            delta = np.zeros(n)
+            for w in reversed(order):
+                for v in preds[w]:
+                    delta[v] += sigma[v] / sigma[w] * (1 + delta[w])
+                if w != source:
+                    centrality[w] += delta[w]
+        return centrality / ((n - 1) * (n - 2)) if n > 2 else centrality
+
+    def clustering(self) -> np.ndarray:
+        """Local clustering coefficient of the undirected 'ever passed to each other' graph"""
+        adjacency = ((self.matrix + self.matrix.T) > 0).astype("float64")
+        adjacency.setdiag(0)
+        adjacency.eliminate_zeros()
+        degree = np.asarray(adjacency.sum(axis=1)).ravel()
+        triangles = np.asarray((adjacency @ adjacency).multiply(adjacency).sum(axis=1)).ravel() / 2
+        possible = degree * (degree - 1) / 2
+        return np.divide(triangles, possible, out=np.zeros(len(self)), where=possible > 0)
+
+    def metrics(self) -> pd.DataFrame:
+        """One row per player with degree, PageRank, betweenness and clustering"""
+        df = pd.DataFrame({"player_id": self.player_ids, **self.degree()})
+        df.insert(1, "player_name", [self.names.get(int(pid), str(pid)) for pid in self.player_ids])
+        df["pagerank"] = self.pagerank()
+        df["betweenness"] = self.betweenness()
+        df["clustering"] = self.clustering()
+        return df.set_index("player_id").sort_values("pagerank", ascending=False)
+
+    def summary(self, label: str, top: int = 3) -> str:
+        """Short text description of the network for prompts and reports"""
+        if len(self) == 0:
+            return f"{label}: no passes recorded."
+        metrics = self.metrics()
+        pairs = self.pairs().nlargest(top, "pass_count")
+        name = lambda pid: self.names.get(int(pid), str(pid))
+        hubs = ", ".join(f"{row.player_name} ({row.pagerank:.3f})" for row in metrics.head(top).itertuples())
+        bridges = ", ".join(f"{row.player_name} ({row.betweenness:.3f})"
+                            for row in metrics.nlargest(top, "betweenness").itertuples())
+        links = ", ".join(f"{name(row.pos_min)} ↔ {name(row.pos_max)} ({row.pass_count})"
+                          for row in pairs.itertuples())
+        return (
+            f"{label}: {self.n_passes} passes between {len(self)} players.\n"
+            f"- Hubs (PageRank): {hubs}\n"
+            f"- Connectors (betweenness): {bridges}\n"
+            f"- Most frequent links: {links}\n"
+            f"- Mean clustering: {metrics['clustering'].mean():.2f}"
+        )
+
+
+def load_match_events(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, usecols=lambda c: c in EVENT_COLUMNS, low_memory=False)
+
+
+class PassEvents:
+    """Every pass with a known recipient across a set of matches, as flat integer arrays.
+
+    graph() selects any team / match subset with a boolean mask, so season
+    networks never go back through pandas.
+    """
+
+    def __init__(self, frames: Iterable[pd.DataFrame]):
+        events = pd.concat(list(frames), ignore_index=True)
+        named = events.dropna(subset=["player_id", "player_name"]).drop_duplicates("player_id")
+        self.names: Dict[int, str] = dict(zip(named["player_id"].astype("int64"), named["player_name"]))
+
+        passes = events[(events["type_name"] == "Pass")].dropna(subset=["player_id", "pass_recipient_id"])
+        passers = passes["player_id"].to_numpy("int64")
+        receivers = passes["pass_recipient_id"].to_numpy("int64")
+        self.player_ids, codes = np.unique(np.concatenate([passers, receivers]), return_inverse=True)
+        self.passer, self.receiver = codes[:len(passes)], codes[len(passes):]
+        self.match_id = passes["match_id"].to_numpy("int64")
+        team_codes, self.teams = pd.factorize(passes["team_name"])
+        self.team = team_codes.astype("int64")
+        print(f"🔗 Loaded {len(passes)} passes from {len(np.unique(self.match_id))} matches")
+
+    @classmethod
+    def from_dir(cls, event_dir: str = EVENT_DATA_DIR, match_ids: Optional[Iterable] = None) -> "PassEvents":
+        """Load match_<id>_.csv event files (all of them unless match_ids is given)"""
+        if match_ids is None:
+            paths = sorted(glob.glob(os.path.join(event_dir, "match_*_.csv")))
+        else:
+            paths = [os.path.join(event_dir, f"match_{int(m)}_.csv") for m in match_ids]
+        return cls(load_match_events(path) for path in paths)
+
+    @property
+    def match_ids(self) -> List[int]:
+        return sorted(int(m) for m in np.unique(self.match_id))
+
+    def team_match_ids(self, team_name: str) -> List[int]:
+        team = self.teams.get_indexer([team_name])[0]
+        return sorted(int(m) for m in np.unique(self.match_id[self.team == team]))
+
+    def graph(self, team_name: Optional[str] = None, match_ids: Optional[Iterable] = None) -> PassGraph:
+        """Summed pass network of a team (or everyone) over the given matches (or all)"""
+        mask = np.ones(len(self.passer), dtype=bool)
+        if team_name is not None:
+            mask &= self.team == self.teams.get_indexer([team_name])[0]
+        if match_ids is not None:
+            mask &= np.isin(self.match_id, np.asarray(list(match_ids), dtype="int64"))
+        return PassGraph.from_codes(self.player_ids, self.passer[mask], self.receiver[mask], self.names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pass network metrics for a team")
+    parser.add_argument("team")
+    parser.add_argument("--matches", nargs="+", type=int, help="match ids (default: every match of the team)")
+    parser.add_argument("--event-dir", default=EVENT_DATA_DIR)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    events = PassEvents.from_dir(args.event_dir)
+    match_ids = args.matches or events.team_match_ids(args.team)
+    if not match_ids:
+        raise SystemExit(f"❌ No passes for {args.team} in {args.event_dir}")
+    graph = events.graph(args.team, match_ids)
+    print(graph.summary(f"{args.team} ({len(match_ids)} matches)"))
+    print(graph.metrics().head(args.top).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# Player similarity over the season player table.
+# Per-90 and percentage metrics are z-scored into one matrix; "players like X"
+# is a cosine nearest-neighbour search over those vectors. Each role gets its
+# own sub-index, with the role's key metrics (Player_Role_Profile.csv)
+# up-weighted, so "like X within role Y" only scores players of role Y.
+# python -m src.player_similarity "Yuki Nogami" ["Other Player" ...] [--role "Box to Box"] [--k 10]
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from typing import Dict, List, Optional, Sequence
+
+from src.file_catalog import normalize_name
+from src.lineup_optimizer import PLAYER_CSV_PATH, load_role_metrics
+
+# Weight of a role's key metrics relative to the other metrics
+KEY_METRIC_WEIGHT = float(os.getenv("KEY_METRIC_WEIGHT", "3.0"))
+# Players below this many minutes are not returned as matches (their per-90s are noise)
+SIMILARITY_MIN_MINUTES = int(os.getenv("SIMILARITY_MIN_MINUTES", "300"))
+SIMILARITY_K = 10
+# Close names offered when a player is not found
+SUGGESTION_LIMIT = 3
+SUGGESTION_MIN_SCORE = 60
+# Rate columns that describe how a player plays rather than how much
+RATE_SUFFIXES = ("per 90", ", %", ", m")
+RATE_PREFIXES = ("PAdj",)
+# Share of time at a position, not a playing metric
+EXCLUDED_METRICS = {"Primary position, %", "Secondary position, %", "Third position, %"}
+
+
+def similarity_metrics(players: pd.DataFrame) -> List[str]:
+    """Numeric rate columns of the player table used as the similarity space"""
+    return [
+        c for c in players.columns
+        if (c.endswith(RATE_SUFFIXES) or c.startswith(RATE_PREFIXES)) and c not in EXCLUDED_METRICS
+        and pd.api.types.is_numeric_dtype(players[c])
+    ]
+
+
+def standardize(values: np.ndarray) -> np.ndarray:
+    """Column z-scores; missing values (e.g. goalkeeper metrics of outfielders) sit at the mean"""
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    std[~(std > 0)] = 1.0
+    z = (values - mean) / std
+    return np.nan_to_num(z, nan=0.0).astype("float32")
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class VectorIndex:
+    """Exact inner-product index: FAISS when installed, numpy otherwise"""
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray):
+        self.ids = ids
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        try:
+            import faiss
+            self.index = faiss.IndexFlatIP(vectors.shape[1])
+            self.index.add(vectors)
+            self.vectors = None
+        except ImportError:
+            self.index = None
+            self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, queries: np.ndarray, k: int):
+        """(scores, ids) of the k best matches per query row; id -1 pads short results"""
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        k = min(k, len(self.ids))
+        if k == 0:
+            return np.zeros((len(queries), 0), "float32"), np.zeros((len(queries), 0), "int64")
+        if self.index is not None:
+            scores, local = self.index.search(queries, k)
+        else:
+            sims = queries @ self.vectors.T
+            local = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(sims, local, axis=1), axis=1)
+            local = np.take_along_axis(local, order, axis=1)
+            scores = np.take_along_axis(sims, local, axis=1)
+        return scores, np.where(local >= 0, self.ids[np.maximum(local, 0)], -1)
+
+
+class PlayerSimilarity:
+    """Nearest neighbours of players in the standardized metric space.
+
+    Vectors are built once; the league-wide index and every role sub-index
+    are created lazily on first use, so a batch of queries costs one matrix
+    product per index touched.
+    """
+
+    def __init__(self, players: pd.DataFrame, role_metrics: Optional[Dict[str, List[str]]] = None,
+                 min_minutes: int = SIMILARITY_MIN_MINUTES):
+        self.players = players.reset_index(drop=True)
+        self.role_metrics = role_metrics or {}
+        self.metrics = similarity_metrics(self.players)
+        values = self.players[self.metrics].to_numpy("float64")
+        self.z = standardize(values)
+        minutes = pd.to_numeric(self.players["Minutes played"], errors="coerce").fillna(0).to_numpy()
+        self.eligible = minutes >= min_minutes
+        self.roles = self.players["player_style"].fillna("").to_numpy()
+        names = self.players["Full name"].fillna(self.players["Player"])
+        self.names = names.tolist()
+        self._lookup: Dict[str, List[int]] = {}
+        for column in ("Full name", "Player"):
+            for row, name in self.players[column].items():
+                if isinstance(name, str):
+                    rows = self._lookup.setdefault(normalize_name(name), [])
+                    if row not in rows:
+                        rows.append(row)
+        self._indexes: Dict[str, VectorIndex] = {}
+
+    @classmethod
+    def from_csv(cls, path: str = PLAYER_CSV_PATH, min_minutes: int = SIMILARITY_MIN_MINUTES) -> "PlayerSimilarity":
+        return cls(pd.read_csv(path), load_role_metrics(), min_minutes)
+
+    def weights(self, role: Optional[str] = None) -> np.ndarray:
+        """Per-metric weights: the role's key metrics count KEY_METRIC_WEIGHT times"""
+        w = np.ones(len(self.metrics), dtype="float32")
+        if role:
+            key = set(self.role_metrics.get(role, []))
+            w[[i for i, m in enumerate(self.metrics) if m in key]] = KEY_METRIC_WEIGHT
+        return w
+
+    def _index(self, role: Optional[str]) -> VectorIndex:
+        key = role or ""
+        if key not in self._indexes:
+            rows = self.eligible & (self.roles == role) if role else self.eligible
+            ids = np.flatnonzero(rows)
+            self._indexes[key] = VectorIndex(_normalize_rows(self.z[ids] * self.weights(role)), ids)
+        return self._indexes[key]
+
+    def resolve(self, name: str, team: Optional[str] = None) -> int:
+        """Row of a player by full or short name; team breaks ties between namesakes"""
+        rows = self._lookup.get(normalize_name(name), [])
+        if team:
+            rows = [r for r in rows if normalize_name(self.players.at[r, "Team"]) == normalize_name(team)]
+        if not rows:
+            raise KeyError(f"Unknown player: {name}" + (f" ({team})" if team else ""))
+        return rows[0]
+
+    def suggest(self, name: str, limit: int = SUGGESTION_LIMIT) -> List[str]:
+        """Known player names closest to an unresolved one"""
+        names = list(dict.fromkeys(self.names))
+        matches = process.extract(name, names, scorer=fuzz.token_set_ratio, limit=limit)
+        return [m[0] for m in matches if m[1] >= SUGGESTION_MIN_SCORE]
+
+    def search_rows(self, rows: Sequence[int], role: Optional[str] = None, k: int = SIMILARITY_K):
+        """(scores, rows) of the k most similar players per query row, the query player excluded"""
+        if role and role not in set(self.roles):
+            raise KeyError(f"Unknown role: {role}")
+        rows = np.asarray(rows, dtype="int64")
+        index = self._index(role)
+        queries = _normalize_rows(self.z[rows] * self.weights(role))
+        scores, found = index.search(queries, k + 1)
+        results_scores, results_rows = [], []
+        for query, row_scores, row_found in zip(rows, scores, found):
+            keep = (row_found != query) & (row_found >= 0)
+            results_scores.append(row_scores[keep][:k])
+            results_rows.append(row_found[keep][:k])
+        return results_scores, results_rows
+
+    def similar(self, names: Sequence[str], role: Optional[str] = None, k: int = SIMILARITY_K) -> pd.DataFrame:
+        """Batch lookup: the k players most like each named player, optionally within one role"""
+        query_rows = [self.resolve(name) for name in names]
+        scores, found = self.search_rows(query_rows, role, k)
+        records = []
+        for query, row_scores, row_found in zip(query_rows, scores, found):
+            for rank, (score, row) in enumerate(zip(row_scores, row_found), 1):
+                records.append({
+                    "query": self.names[query],
+                    "rank": rank,
+                    "player": self.names[row],
+                    "team": self.players.at[row, "Team"],
+                    "role": self.roles[row],
+                    "minutes": int(self.players.at[row, "Minutes played"]),
+                    "similarity": round(float(score), 3),
+                })
+        return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find players with a similar statistical profile")
+    parser.add_argument("players", nargs="+")
+    parser.add_argument("--role", help="only return players of this role (player_style)")
+    parser.add_argument("--k", type=int, default=SIMILARITY_K)
+    parser.add_argument("--min-minutes", type=int, default=SIMILARITY_MIN_MINUTES)
+    args = parser.parse_args()
+
+    similarity = PlayerSimilarity.from_csv(min_minutes=args.min_minutes)
+    for name in args.players:
+        try:
+            similarity.resolve(name)
+        except KeyError:
+            suggestions = similarity.suggest(name)
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            print(f"⚠️ Unknown player: {name}.{hint}")
+            return
+    try:
+        print(similarity.similar(args.players, args.role, args.k).to_string(index=False))
+    except KeyError as e:
+        print(f"⚠️ {e.args[0]}. Known roles: {', '.join(sorted(set(similarity.roles) - {''}))}")
+
+
+if __name__ == "__main__":
+    main()
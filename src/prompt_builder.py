@@ -4,16 +4,19 @@ import pandas as pd
 from typing import Tuple
 from src.extract_entities import extract_entities
 from src.tactical_summary_builder import build_tactical_summary
-from glob import glob
+from src.file_catalog import DATA_DIR, get_catalog
+from src.context_packer import CONTEXT_TOKEN_BUDGET, compact_json, count_tokens, pack_context
+from src.retriever import FAISS_DIR, format_documents, normalize_metadata_value, retrieve
+from src.mismatch_matrix import MISMATCH_CACHE_DIR, mismatch_summary
 
-# Folder where all match files are stored
-DATA_DIR = "data/files1/"
+# Separates the context part of a prompt from the analyst's question
+QUESTION_MARKER = "\n\nQuestion: "
 
 
 def read_json(file_path: str) -> str:
     if os.path.exists(file_path):
         with open(file_path, "r", encoding="utf-8") as f:
-            return f"{os.path.basename(file_path)}:\n" + f.read()
+            return f"{os.path.basename(file_path)}:\n" + compact_json(json.load(f))
     return ""
 
 
@@ -25,27 +28,26 @@ def read_csv(file_path: str) -> str:
 
 
 def get_last_n_team_matches(team_name: str, n=3):
-    pattern = os.path.join(DATA_DIR, f"match_*__team_{team_name.replace(' ', '_')}_summary.json")
-    files = sorted(glob(pattern), key=os.path.getmtime, reverse=True) 
+    catalog = get_catalog()
+    entries = catalog.last_team_matches(team_name, n)
 
-    print(f"🔍 Found {len(files)} files for {team_name}")
-    for f in files:
-        print(f" - {f}")
+    print(f"🔍 Found {len(entries)} files for {team_name}")
+    for e in entries:
+        print(f" - {e['path']} ({e['date'].date() if e['date'] is not None else 'no date'})")
 
-    match_files = files[:n]
     summaries = []
     stat_files = []
 
-    for f in match_files:
+    for e in entries:
+        f = e["path"]
         try:
             with open(f, "r", encoding="utf-8") as j:
                 data = json.load(j)
-            match_id = os.path.basename(f).split("_")[1]
             summary = build_tactical_summary(team_name, data)
             summaries.append((os.path.basename(f), summary))
 
-            stat_path = os.path.join(DATA_DIR, f"match_{match_id}_Team_stat.csv")
-            if os.path.exists(stat_path):
+            stat_path = catalog.path(e["match_id"], "team_stats")
+            if stat_path:
                 stat_files.append(stat_path)
 
         except Exception as e:
@@ -56,7 +58,7 @@ def get_last_n_team_matches(team_name: str, n=3):
 
 
 
-def build_prompt(query: str) -> Tuple[str, list]:
+def build_prompt(query: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[str, list]:
     entities = extract_entities(query)
     match_id = entities.get("match_id")
     player = entities.get("player_name")
@@ -64,45 +66,72 @@ def build_prompt(query: str) -> Tuple[str, list]:
     team2 = entities.get("team_2")
     is_chat = entities.get("is_chat")
 
+    catalog = get_catalog()
     context_parts = []
     loaded_files = []
+    # (type, match_id) of file-based context, so retrieval doesn't repeat it
+    loaded_keys = set()
 
     if match_id:
-        summary_files = sorted(
-            glob(os.path.join(DATA_DIR, f"match_{match_id}__team_*_summary.json"))
-        )
-
-        for summary_file in summary_files:
-            team_name = os.path.basename(summary_file).split("__team_")[1].replace("_summary.json", "").replace("_", " ")
+        for entry in catalog.team_summaries(match_id):
+            summary_file = entry["path"]
+            team_name = entry["team"]
             with open(summary_file, "r", encoding="utf-8") as f:
                 team_summary = json.load(f)
                 tactical_summary = build_tactical_summary(team_name, team_summary)
                 context_parts.append(f"[Tactical Overview: {team_name}]\n{tactical_summary}")
                 loaded_files.append(summary_file)
+                loaded_keys.add(("team_summary", str(match_id)))
 
-        stats_file = os.path.join(DATA_DIR, f"match_{match_id}_Team_stat.csv")
-        if os.path.exists(stats_file):
+        stats_file = catalog.path(match_id, "team_stats")
+        if stats_file:
             context_parts.append(read_csv(stats_file))
             loaded_files.append(stats_file)
+            loaded_keys.add(("team_stats", str(match_id)))
 
     elif player and match_id:
-        player_file = os.path.join(DATA_DIR, f"match_{match_id}__player_{player.replace(' ', '_')}_summary.json")
-        if os.path.exists(player_file):
+        player_file = catalog.path(match_id, "player_summary", player)
+        if player_file:
             context_parts.append(read_json(player_file))
             loaded_files.append(player_file)
+            loaded_keys.add(("player_summary", str(match_id)))
 
     elif is_chat and team1:
-        summaries = get_last_n_team_matches(team1)
+        summaries, _ = get_last_n_team_matches(team1)
         for file_name, summary in summaries:
             context_parts.append(f"[Summary from {file_name}]\n{summary}")
             loaded_files.append(os.path.join(DATA_DIR, file_name))
+            loaded_keys.add(("team_summary", file_name.split("_")[1]))
 
         if summaries:
             last_match_id = summaries[-1][0].split("_")[1]
-            stats_file = os.path.join(DATA_DIR, f"match_{last_match_id}_Team_stat.csv")
-            if os.path.exists(stats_file):
+            stats_file = catalog.path(last_match_id, "team_stats")
+            if stats_file:
                 context_parts.append(read_csv(stats_file))
                 loaded_files.append(stats_file)
+                loaded_keys.add(("team_stats", last_match_id))
+
+    # ⚔️ Precomputed strength-vs-weakness lookup for a two-team question
+    if team1 and team2:
+        mismatch = mismatch_summary(team1, team2)
+        if mismatch:
+            context_parts.append(mismatch)
+            loaded_files.append(os.path.join(MISMATCH_CACHE_DIR, "mismatch.npz"))
+
+    # 📚 Semantic retrieval from the prebuilt FAISS index, scoped to the detected entities
+    if match_id:
+        filters = {"match_id": match_id}
+    elif team1:
+        filters = {"team_name": [team1, team2]}
+    else:
+        filters = None
+    retrieved = [
+        doc for doc in retrieve(query, filters=filters)
+        if (doc.metadata.get("type"), normalize_metadata_value("match_id", doc.metadata.get("match_id"))) not in loaded_keys
+    ]
+    if retrieved:
+        context_parts += format_documents(retrieved)
+        loaded_files.append(os.path.join(FAISS_DIR, "index.faiss"))
 
     # 📜 System instructions for the LLM
     system_prompt = (
@@ -113,14 +142,14 @@ def build_prompt(query: str) -> Tuple[str, list]:
         "If multiple matches are shown, identify common patterns and explain how to beat or emulate the team."
     )
 
-    context = "\n\n".join([p for p in context_parts if p.strip()])
-    print("\n================= FINAL CONTEXT (TRUNCATED) =================")
+    context = pack_context([p for p in context_parts if p.strip()], query, token_budget)
+    print(f"\n================= FINAL CONTEXT ({count_tokens(context)} tokens, TRUNCATED) =================")
     print(context[:1500])
     print("=============================================================\n")
     print(f"✅ Loaded files ({len(loaded_files)}):")
     for f in loaded_files:
         print(f" - {f}")
 
-    prompt = f"{system_prompt}\n\nContext:\n{context}\n\nQuestion: {query}"
+    prompt = f"{system_prompt}\n\nContext:\n{context}{QUESTION_MARKER}{query}"
     return prompt, loaded_files
 
@@ -0,0 +1,97 @@
+# Retrieval quality / latency benchmark over a labelled question set.
+# python -m src.retrieval_benchmark --modes vector bm25 hybrid --k 3 6 10
+# Each line of the question file: {"question", "relevant": {metadata predicate}, "filters"?}
+import json
+import time
+import argparse
+from typing import Dict, List, Optional
+
+from src.partitioned_index import field_values, normalize_field_value
+from src.retriever import load_index, rank_rows
+
+QUESTIONS_PATH = "data/benchmarks/retrieval_questions.jsonl"
+# Modes that rank with the embedding model
+VECTOR_MODES = ("vector", "hybrid")
+
+
+def load_questions(path: str = QUESTIONS_PATH) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def matches_predicate(metadata: Dict, predicate: Dict) -> bool:
+    return all(normalize_field_value(field, value) in field_values(field, metadata)
+               for field, value in predicate.items())
+
+
+def relevant_rows(metadatas: List[Dict], predicate: Dict) -> set:
+    return {row for row, metadata in enumerate(metadatas) if matches_predicate(metadata, predicate)}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] if ordered else 0.0
+
+
+def run_benchmark(questions: List[Dict], modes: List[str], ks: List[int]) -> Dict[str, Optional[Dict]]:
+    """recall@k and latency per mode; None for modes that need the unavailable embedding model"""
+    loaded = load_index()
+    if loaded is None:
+        raise SystemExit("❌ No index to benchmark")
+    metadatas = loaded[1].metadatas()
+    labelled = []
+    for q in questions:
+        relevant = relevant_rows(metadatas, q["relevant"])
+        if not relevant:
+            print(f"⚠️ No chunk matches the label of: {q['question']}")
+            continue
+        labelled.append((q, relevant))
+    if not labelled:
+        raise SystemExit("❌ No question label matches any indexed chunk; check the labels against the index")
+
+    depth = max(ks)
+    results = {}
+    for mode in modes:
+        if mode in VECTOR_MODES and loaded[2] is None:
+            # rank_rows would quietly fall back to BM25 and report its numbers under this name
+            print(f"⚠️ Skipping {mode}: embedding model unavailable")
+            results[mode] = None
+            continue
+        rank_rows(labelled[0][0]["question"], depth, labelled[0][0].get("filters"), mode)  # warm-up
+        recalls = {k: [] for k in ks}
+        latencies = []
+        for q, relevant in labelled:
+            start = time.perf_counter()
+            rows = rank_rows(q["question"], depth, q.get("filters"), mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            for k in ks:
+                recalls[k].append(len(relevant & set(rows[:k])) / min(len(relevant), k))
+        results[mode] = {
+            **{f"recall@{k}": round(sum(v) / len(v), 3) for k, v in recalls.items()},
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+        }
+    print(f"📏 {len(labelled)} labelled questions")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval recall@k and latency")
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    parser.add_argument("--modes", nargs="+", default=["vector", "bm25", "hybrid"])
+    parser.add_argument("--k", nargs="+", type=int, default=[3, 6, 10])
+    args = parser.parse_args()
+
+    results = run_benchmark(load_questions(args.questions), args.modes, args.k)
+    measured = [row for row in results.values() if row is not None]
+    if not measured:
+        raise SystemExit("❌ Every mode was skipped")
+    columns = list(measured[0])
+    print("mode".ljust(8) + "".join(c.rjust(11) for c in columns))
+    for mode, row in results.items():
+        cells = [str(row[c]) for c in columns] if row is not None else ["skipped"] + [""] * (len(columns) - 1)
+        print(mode.ljust(8) + "".join(cell.rjust(11) for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import importlib.util
+import streamlit as st
+from typing import Dict, List, Optional
+from src.file_catalog import normalize_name
+from src.context_packer import compact_text
+from src.partitioned_index import PartitionedIndex
+from src.doc_store import open_doc_store
+from src.embedding_pipeline import EMBEDDING_MODEL, get_embeddings
+
+FAISS_DIR = "data/faiss_index"
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "6"))
+# "hybrid" (BM25 + vectors, rank-fused), "vector" or "bm25"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Candidates each ranker contributes before fusion
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "30"))
+RRF_K = 60
+
+NAME_KEYS = {"team_name", "player_name", "name", "team"}
+
+
+@st.cache_resource(show_spinner=False)
+def load_index(index_dir: str = FAISS_DIR):
+    """Partitioned FAISS index, doc store and embedding model, once per process.
+
+    Only metadata is read up front; chunk text stays in the memory-mapped
+    doc store until a search returns its row.
+    """
+    if not os.path.exists(os.path.join(index_dir, "index.faiss")):
+        print(f"⚠️ Retrieval disabled: no FAISS index in {index_dir}")
+        return None
+    try:
+        import faiss
+    except ImportError as e:
+        print(f"⚠️ Retrieval disabled, missing dependency: {e}")
+        return None
+    try:
+        docstore = open_doc_store(index_dir)
+        if docstore is None:
+            print(f"⚠️ Retrieval disabled: no document store in {index_dir}")
+            return None
+        index = PartitionedIndex.from_faiss(faiss.read_index(os.path.join(index_dir, "index.faiss")),
+                                            docstore.metadatas())
+    except Exception as e:
+        print(f"❌ Could not load FAISS index from {index_dir}: {e}")
+        return None
+    if importlib.util.find_spec("sentence_transformers"):
+        # Cached query embeddings: repeated questions skip the model
+        embeddings = get_embeddings(EMBEDDING_MODEL)
+        try:
+            embeddings.model
+        except Exception as e:
+            # Loaded once per process: later queries go straight to BM25
+            print(f"⚠️ Could not load {EMBEDDING_MODEL} ({e}), retrieval falls back to BM25 only")
+            embeddings = None
+    else:
+        print("⚠️ sentence-transformers not installed, retrieval falls back to BM25 only")
+        embeddings = None
+    print(f"📚 Loaded FAISS index with {len(docstore)} chunks")
+    return index, docstore, embeddings
+
+
+def normalize_metadata_value(key: str, value) -> str:
+    # The chunk builders disagree on formats: "3925555.0" vs "3925555",
+    # "Urawa_Reds" vs "Urawa Reds"
+    if key == "match_id":
+        return str(value).split(".")[0]
+    if key in NAME_KEYS:
+        return normalize_name(value)
+    return str(value)
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[int]:
+    """Merge ranked row lists; each list adds 1 / (k + rank) to a row's score"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def rank_rows(query: str, k: int = RETRIEVAL_K, filters: Optional[Dict] = None,
+              mode: str = RETRIEVAL_MODE) -> List[int]:
+    """Doc store rows of the top-k chunks for the query"""
+    loaded = load_index()
+    if loaded is None:
+        return []
+    index, docstore, embeddings = loaded
+    depth = RETRIEVAL_CANDIDATES if mode == "hybrid" else k
+    rankings = []
+    vector_ok = False
+    if mode in ("hybrid", "vector") and embeddings is not None:
+        try:
+            rankings.append([row for row, _ in index.search(embeddings.embed_query(query), depth, filters)])
+            vector_ok = True
+        except Exception as e:
+            print(f"⚠️ Vector search failed ({e}), using BM25 only")
+    if mode in ("hybrid", "bm25") or not vector_ok:
+        # Exact tokens (team names, "PPDA", "xGA") that MiniLM blurs
+        rankings.append([row for row, _ in docstore.search_text(query, depth, index.allowed_rows(filters))])
+    if len(rankings) == 1:
+        return rankings[0][:k]
+    return reciprocal_rank_fusion(rankings)[:k]
+
+
+def retrieve(query: str, k: int = RETRIEVAL_K, filters: Optional[Dict] = None,
+             mode: str = RETRIEVAL_MODE) -> List:
+    """Top-k chunks for the query whose metadata satisfies filters.
+
+    Filters are applied inside each ranker (see PartitionedIndex), so a
+    scoped query never spends its k on other teams or matches.
+    """
+    loaded = load_index()
+    if loaded is None:
+        return []
+    return loaded[1].get(rank_rows(query, k, filters, mode))
+
+
+def has_value(value) -> bool:
+    """False for missing metadata; the chunk builders store NaN as the string "nan" """
+    return value is not None and str(value).strip().lower() not in ("", "nan", "none")
+
+
+def format_documents(docs: List) -> List[str]:
+    """Prompt sections for retrieved chunks"""
+    sections = []
+    for doc in docs:
+        meta = doc.metadata
+        label = ", ".join(
+            f"{k}={normalize_metadata_value('match_id', meta[k]) if k == 'match_id' else meta[k]}"
+            for k in ("match_id", "team_name", "player_name", "name", "match")
+            if has_value(meta.get(k))
+        )
+        sections.append(f"[Retrieved {meta.get('type', 'chunk')}: {label}]\n{compact_text(doc.page_content)}")
+    return sections
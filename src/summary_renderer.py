@@ -0,0 +1,250 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+VERBOSITY_LEVELS = {"brief": 0, "standard": 1, "full": 2}
+DEFAULT_SCHEMA_VERSION = "v1"
+
+# Team summary schema as written by generate_team_tactical_summaries.py.
+# Each section is (title, base_path, [(label, relative_path, kind, min_level)]).
+# kind: value | dict | list | lineup | table | players
+DTA = ("detailed_tactical_analysis",)
+TEAM_SUMMARY_SCHEMAS = {
+    "v1": [
+        ("Match", (), [
+            ("team", ("team",), "value", 0),
+            ("formation", ("formation",), "value", 0),
+            ("match_id", ("match_id",), "value", 0),
+            ("summary", ("summary",), "value", 2),
+            ("patterns", ("key_tactical_patterns",), "list", 0),
+        ]),
+        ("Possession", DTA + ("possession",), [
+            ("passes", ("pass_accuracy_breakdown", "total_passes"), "value", 0),
+            ("accurate", ("pass_accuracy_breakdown", "accurate_passes"), "value", 0),
+            ("inaccurate", ("pass_accuracy_breakdown", "inaccurate_passes"), "value", 0),
+            ("progressive", ("pass_accuracy_breakdown", "progressive_passes"), "value", 0),
+            ("progressive_accurate", ("pass_accuracy_breakdown", "progressive_accurate"), "value", 1),
+            ("progressive_inaccurate", ("pass_accuracy_breakdown", "progressive_inaccurate"), "value", 1),
+            ("possessions_with_progressive_pass_%", ("progressive_pass_possession_percentage",), "value", 1),
+            ("pass_types", ("pass_types",), "dict", 1),
+            ("top_pass_clusters", ("pass_clusters",), "dict", 2),
+        ]),
+        ("Attack", DTA + ("attack",), [
+            ("box_entries", ("box_entries",), "value", 0),
+            ("shot_assists", ("shot_assists",), "value", 0),
+            ("goal_assists", ("goal_assists",), "value", 0),
+            ("attack_zones", ("preferred_attack_zones",), "dict", 1),
+        ]),
+        ("Shots", DTA + ("shots",), [
+            ("xG", ("xG_total",), "value", 0),
+            ("xGOT", ("xGOT_total",), "value", 0),
+            ("outcomes", ("shot_outcomes",), "dict", 1),
+            ("types", ("shot_types",), "dict", 2),
+            ("freeze_frames", ("freeze_frame_context",), "dict", 1),
+        ]),
+        ("Defense", DTA + ("defense",), [
+            ("offensive_blocks", ("offensive_blocks",), "value", 1),
+            ("goal_saving_blocks", ("goal_saving_blocks",), "value", 1),
+            ("headers_on_shots", ("headers_on_shots",), "value", 2),
+            ("aerial_duels_won", ("aerial_pass_duels_won",), "value", 1),
+            ("fouls_won_defensively", ("fouls_won_defensively",), "value", 2),
+            ("duels", ("duel_types",), "dict", 1),
+            ("interceptions", ("interception_outcomes",), "dict", 1),
+            ("fifty_fifty", ("fifty_fifty_outcomes",), "dict", 2),
+        ]),
+        ("Movement", DTA + ("movement",), [
+            ("sprints_1st_half", ("first_half_sprints",), "value", 1),
+            ("sprints_2nd_half", ("second_half_sprints",), "value", 1),
+            ("sprint_drop_%", ("sprint_intensity_drop_pct",), "value", 1),
+            ("high_accelerations", ("high_accelerations",), "value", 2),
+            ("distance_m", ("total_running_distance",), "value", 1),
+            ("m_per_min", ("avg_intensity_m_per_min",), "value", 1),
+            ("under_pressure_actions", ("under_pressure_actions",), "value", 2),
+            ("counterpress_actions", ("counterpress_actions",), "value", 1),
+        ]),
+        ("Special plays", DTA + ("special_plays",), [
+            ("corners", ("corner_passes",), "value", 1),
+            ("free_kicks", ("free_kick_passes",), "value", 1),
+            ("throw_ins", ("throw_in_passes",), "value", 1),
+            ("through_balls", ("through_balls",), "value", 1),
+            ("crosses", ("crosses",), "value", 1),
+            ("cutbacks", ("cutback_passes",), "value", 1),
+            ("inswingers", ("inswingers",), "value", 2),
+            ("straight_passes", ("straight_passes",), "value", 2),
+            ("dummy_passes", ("dummy_passes",), "value", 2),
+            ("offensive_recoveries", ("offensive_recoveries",), "value", 2),
+            ("shots_deflected", ("shots_deflected",), "value", 2),
+            ("open_goal_shots", ("open_goal_shots",), "value", 2),
+            ("techniques", ("pass_techniques",), "dict", 2),
+        ]),
+        ("Carries", DTA + ("carries",), [
+            ("distance_m", ("total_carry_distance",), "value", 1),
+            ("into_final_third", ("into_final_third",), "value", 1),
+            ("into_box", ("into_penalty_box",), "value", 1),
+            ("into_zone_14", ("into_zone_14",), "value", 1),
+            ("led_to_shot", ("leads_to_shot",), "value", 1),
+            ("led_to_goal", ("leads_to_goal",), "value", 1),
+            ("dispossessed_at_end", ("dispossessed_at_end",), "value", 2),
+        ]),
+        ("Goalkeeping", DTA + ("goalkeeper",), [
+            ("shots_saved_to_post", ("shots_saved_to_post",), "value", 2),
+            ("keeper_saved_to_post", ("keeper_saved_to_post",), "value", 2),
+            ("success_out", ("keeper_success_out",), "value", 2),
+            ("success_in_play", ("keeper_success_in_play",), "value", 2),
+            ("lost_out", ("keeper_lost_out",), "value", 2),
+            ("lost_in_play", ("keeper_lost_in_play",), "value", 2),
+            ("saved_off_target", ("saved_off_target",), "value", 2),
+            ("punches", ("punches",), "value", 2),
+        ]),
+        ("Discipline", DTA + ("discipline",), [
+            ("penalties_conceded", ("penalties_conceded",), "value", 1),
+            ("penalties_won", ("penalties_won",), "value", 1),
+            ("offensive_fouls", ("offensive_fouls",), "value", 2),
+            ("fouls_played_through", ("fouls_played_through",), "value", 2),
+            ("fouls_won_advantage", ("fouls_won_advantage_played",), "value", 2),
+            ("cards", ("cards",), "dict", 1),
+            ("foul_types", ("foul_types",), "dict", 2),
+        ]),
+        ("Lineup", (), [
+            ("xi", ("lineup",), "lineup", 1),
+        ]),
+        ("Best players", (), [
+            ("by_role", ("best_players_by_position",), "players", 1),
+        ]),
+        ("Formation timeline", (), [
+            ("formation_timeline", ("formation_timeline",), "table", 1),
+        ]),
+        ("Physical phases", (), [
+            ("phases", ("physical_phases",), "table", 2),
+        ]),
+    ],
+}
+
+PHASE_COLUMNS = [
+    ("phase", "phase"),
+    ("sprints", "count_sprint"),
+    ("distance_m", "total_distance"),
+    ("m/min", "m/min"),
+    ("sprints/min", "sprints_per_minute"),
+    ("sprints/player", "sprints_per_player"),
+    ("dist/min", "distance_per_minute"),
+    ("avg_sprint_m", "avg_sprint_distance"),
+]
+
+TIMELINE_COLUMNS = [
+    ("minute", "minute"),
+    ("event", "event"),
+    ("formation", "formation"),
+    ("players", "players_on_pitch"),
+    ("minutes", "minutes"),
+]
+# Table field label -> (header, key) columns
+TABLE_COLUMNS = {
+    "phases": PHASE_COLUMNS,
+    "formation_timeline": TIMELINE_COLUMNS,
+}
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == {} or value == []
+
+
+def _strip_unit(value: Any) -> Any:
+    # Phase values are stored as "25 sprints", "18505.02 meters", ...
+    if isinstance(value, str) and " " in value:
+        head = value.split(" ", 1)[0]
+        try:
+            float(head)
+            return head
+        except ValueError:
+            pass
+    return value
+
+
+def _render_dict(label: str, value: Dict) -> str:
+    return f"{label}: " + ", ".join(f"{k}={v}" for k, v in value.items())
+
+
+def _render_list(label: str, value: List) -> str:
+    return f"{label}: " + "; ".join(str(v) for v in value)
+
+
+def _render_lineup(label: str, value: List[Dict]) -> str:
+    return f"{label}: " + ", ".join(f"{p.get('name')} ({p.get('position')})" for p in value)
+
+
+def _render_players(label: str, value: Dict) -> str:
+    lines = []
+    for role, info in value.items():
+        stats = ", ".join(f"{k}={v}" for k, v in info.get("stats", {}).items())
+        lines.append(f"{role}: {info.get('name', 'Unknown')} ({stats})")
+    return "\n".join(lines)
+
+
+def _render_table(label: str, value: List[Dict]) -> str:
+    columns = TABLE_COLUMNS[label]
+    rows = ["|".join(name for name, _ in columns)]
+    for row in value:
+        rows.append("|".join(str(_strip_unit(row.get(key, ""))) for _, key in columns))
+    return "\n".join(rows)
+
+
+RENDERERS = {
+    "dict": _render_dict,
+    "list": _render_list,
+    "lineup": _render_lineup,
+    "players": _render_players,
+    "table": _render_table,
+}
+
+
+@lru_cache(maxsize=None)
+def compile_schema(version: str, verbosity: str) -> Tuple:
+    """Flatten a schema version into absolute paths for one verbosity level"""
+    level = VERBOSITY_LEVELS[verbosity]
+    compiled = []
+    for title, base, fields in TEAM_SUMMARY_SCHEMAS[version]:
+        kept = tuple(
+            (label, base + path, kind)
+            for label, path, kind, min_level in fields
+            if min_level <= level
+        )
+        if kept:
+            compiled.append((title, kept))
+    return tuple(compiled)
+
+
+def _lookup(data: Dict, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def render_team_summary(team_summary: Dict, verbosity: str = "standard") -> str:
+    """Render a team summary JSON as compact key:value sections.
+
+    Sections are separated by blank lines and missing/empty fields are
+    skipped, so the output packs well with context_packer.
+    """
+    version = team_summary.get("schema_version", DEFAULT_SCHEMA_VERSION)
+    if version not in TEAM_SUMMARY_SCHEMAS:
+        print(f"⚠️ Unknown summary schema {version}, rendering as {DEFAULT_SCHEMA_VERSION}")
+        version = DEFAULT_SCHEMA_VERSION
+    blocks = []
+    for title, fields in compile_schema(version, verbosity):
+        scalars = []
+        lines = []
+        for label, path, kind in fields:
+            value = _lookup(team_summary, path)
+            if _is_empty(value):
+                continue
+            if kind == "value":
+                scalars.append(f"{label}: {value}")
+            else:
+                lines.append(RENDERERS[kind](label, value))
+        if scalars:
+            lines.insert(0, ", ".join(scalars))
+        if lines:
+            blocks.append(f"[{title}]\n" + "\n".join(lines))
+    return "\n\n".join(blocks)
@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import os
+from src.formation_timeline import build_formation_timeline, tag_events
 match_id = "3925226"
 
 event_df = pd.read_csv(r"E:\Ai_com\match_enriched\new\match_3925226_.csv")
@@ -292,7 +293,9 @@ for card in bad_behaviour_cards:
 # ======================= SUBSTITUTION ENRICHMENT =======================
 event_df['substitution_has_replacement'] = event_df['substitution_replacement_id'].notna()
 event_df['substitution_is_tactical_shift'] = event_df['substitution_outcome_name'].astype(str).str.contains('Tactical Shift', case=False, na=False)
-event_df['substitution_formation'] = event_df['tactics_formation'].astype(str)
+# Formation in effect at each event, following tactical shifts (not just the starting shape);
+# untagged events stay NaN like a missing tactics_formation, not the string "None"
+event_df['substitution_formation'] = tag_events(event_df, build_formation_timeline(event_df))['formation'].fillna(np.nan).astype(str)
 
 # ======================= (Rest of the code continues) =======================
 output_path = f"match_{match_id}_TV.parquet"
@@ -7,6 +7,8 @@ import matplotlib.patheffects as path_effects
 import matplotlib.patches as patches
 from mplsoccer import Pitch
 import seaborn as sns
+from src.pass_graph import PassGraph
+from src.freeze_frames import shot_context, summarize_shot_context
 
 # Global styling variables
 green = '#b7b943'
@@ -105,16 +107,9 @@ def get_passes_between_df(team_name, passes_df, players_df, df):
         on="player_id", how='left'
     ).set_index("player_id")
 
-    passes_player_ids_df = passes_df.loc[:, ['index', "player_id", "pass_recipient_id", 'team_name']].copy()
-    passes_player_ids_df.dropna(subset=["player_id", "pass_recipient_id"], inplace=True)
-    passes_player_ids_df["player_id"] = passes_player_ids_df["player_id"].astype(int)
-    passes_player_ids_df["pass_recipient_id"] = passes_player_ids_df["pass_recipient_id"].astype(int)
-
-    passes_player_ids_df['pos_min'] = passes_player_ids_df[['player_id', 'pass_recipient_id']].min(axis=1)
-    passes_player_ids_df['pos_max'] = passes_player_ids_df[['player_id', 'pass_recipient_id']].max(axis=1)
-
-    passes_between_df = passes_player_ids_df.groupby(['pos_min', 'pos_max'])['index'].count().reset_index()
-    passes_between_df.rename(columns={'index': 'pass_count'}, inplace=True)
+    passes_player_ids_df = passes_df.dropna(subset=["player_id", "pass_recipient_id"])
+    passes_between_df = PassGraph.from_passes(passes_player_ids_df["player_id"],
+                                              passes_player_ids_df["pass_recipient_id"]).pairs()
 
     passes_between_df = passes_between_df.merge(average_locs_and_count_df, left_on='pos_min', right_index=True)
     passes_between_df = passes_between_df.merge(average_locs_and_count_df, left_on='pos_max', right_index=True,
@@ -242,98 +237,68 @@ def pass_network_visualization(team_name, passes_between_df, average_locs_and_co
         'Most_passes_in_combination': most_pass_count,
     }
 
-def get_defensive_action_df(df):
-    """Extract defensive actions from match data"""
-    playerdf = df.copy()
-    
-    # Ball Wins
-    ball_wins = playerdf[
-        (playerdf["type_name"] == 'Interception') |
-        (playerdf["type_name"] == 'Ball Recovery')
-    ]
-
-    # Tackles (total and unsuccessful)
-    tk = playerdf[
-        (playerdf["type_name"] == 'Duel') &
-        (playerdf['duel_type_name'].str.contains('Tackle', case=False, na=False))
-    ]
-
-    tk_u = playerdf[
-        (playerdf["type_name"] == 'Duel') &
-        (playerdf['duel_type_name'].str.contains('Tackle', case=False, na=False)) &
-        (playerdf['duel_outcome_name'].isin(['Lost In Play', 'Lost']))
-    ]
-
-    # Interceptions
-    intc = playerdf[
-        (playerdf['type_name'] == 'Interception') &
-        (playerdf['interception_outcome_name'].isin(['Success In Play', 'Won']))
-    ]
-
-    # Ball Recoveries (excluding recovery failures)
-    br = playerdf[
-        (playerdf['type_name'] == 'Ball Recovery') &
-        (playerdf['ball_recovery_recovery_failure'].astype(str) != 'True')
-    ]
-
-    # Clearances
-    cl = playerdf[playerdf["type_name"] == 'Clearance']
-
-    # Fouls
-    fl = playerdf[playerdf["type_name"] == 'Foul Committed']
-
-    # Aerial Duels (total and unsuccessful)
-    ar = playerdf[
-        (playerdf["type_name"] == 'Duel') &
-        (playerdf['duel_type_name'].str.contains('Aerial', case=False, na=False))
-    ]
-
-    ar_u = playerdf[
-        (playerdf["type_name"] == 'Duel') &
-        (playerdf['duel_type_name'].str.contains('Aerial', case=False, na=False)) &
-        (playerdf['duel_outcome_name'] == 'Aerial Lost')
-    ]
-
-    # Blocks
-    pass_bl = playerdf[playerdf["type_name"] == 'Block']
-
-    shot_bl = playerdf[
-        (playerdf["type_name"] == 'Block') &
-        (playerdf['block_save_block'].astype(str).str.contains('TRUE', case=False, na=False))
-    ]
-
-    # Dribbled Past
-    drb_pst = playerdf[playerdf["type_name"] == 'Dribbled Past']
-
-    # Dribble leading to tackle loss
-    drb_tkl = df[
-        (df["type_name"] == 'Duel') &
-        (df['duel_type_name'].str.contains('Tackle', case=False, na=False)) &
-        (df["duel_outcome_name"].isin(['Lost In Play', 'Lost'])) &
-        (df["type_name"].shift(1) == 'Dribble')
-    ]
-
-    # Defensive Errors
-    errors = df[ (
-            ((df['type_name'] == 'Duel') &
-             (df['duel_type_name'].str.contains('Tackle|Aerial', case=False, na=False)) &
-             (df['duel_outcome_name'].isin(['Lost In Play', 'Lost', 'Aerial Lost']))) |
-            (df['type_name'] == 'Foul Committed')
-        )
-    ]
+# Defensive action categories; bit i of an event's label is DEFENSIVE_ACTION_LABELS[i]
+DEFENSIVE_ACTION_LABELS = [
+    'ball_win', 'tackle', 'tackle_lost', 'interception_won', 'ball_recovery', 'clearance', 'foul',
+    'aerial', 'aerial_lost', 'block', 'shot_block', 'dribbled_past', 'dribble_tackle_lost', 'error'
+]
+DEFENSIVE_ACTION_BITS = {label: np.uint16(1 << i) for i, label in enumerate(DEFENSIVE_ACTION_LABELS)}
+
+def _event_col(df, name):
+    """Column as a numpy object array, all-NaN if the match file lacks it"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=object)
+    return np.full(len(df), np.nan, dtype=object)
+
+def defensive_action_labels(df):
+    """One uint16 label per event, one bit per defensive action category"""
+    type_name = _event_col(df, 'type_name')
+    duel_type = pd.Series(_event_col(df, 'duel_type_name'))
+    duel_outcome = _event_col(df, 'duel_outcome_name')
+    prev_type = np.concatenate([[None], type_name[:-1]]) if len(type_name) else type_name
+
+    duel = type_name == 'Duel'
+    tackle = duel & duel_type.str.contains('Tackle', case=False, na=False).to_numpy()
+    aerial = duel & duel_type.str.contains('Aerial', case=False, na=False).to_numpy()
+    tackle_lost = tackle & np.isin(duel_outcome, ['Lost In Play', 'Lost'])
+    aerial_lost = aerial & (duel_outcome == 'Aerial Lost')
+    interception = type_name == 'Interception'
+    recovery = type_name == 'Ball Recovery'
+    foul = type_name == 'Foul Committed'
+    block = type_name == 'Block'
+
+    masks = {
+        'ball_win': interception | recovery,
+        'tackle': tackle,
+        'tackle_lost': tackle_lost,
+        'interception_won': interception & np.isin(_event_col(df, 'interception_outcome_name'), ['Success In Play', 'Won']),
+        'ball_recovery': recovery & (pd.Series(_event_col(df, 'ball_recovery_recovery_failure')).astype(str).to_numpy() != 'True'),
+        'clearance': type_name == 'Clearance',
+        'foul': foul,
+        'aerial': aerial,
+        'aerial_lost': aerial_lost,
+        'block': block,
+        'shot_block': block & pd.Series(_event_col(df, 'block_save_block')).astype(str).str.contains('TRUE', case=False, na=False).to_numpy(),
+        'dribbled_past': type_name == 'Dribbled Past',
+        'dribble_tackle_lost': tackle_lost & (prev_type == 'Dribble'),
+        'error': tackle_lost | aerial_lost | foul,
+    }
+    labels = np.zeros(len(df), dtype=np.uint16)
+    for label, mask in masks.items():
+        labels |= np.where(mask, DEFENSIVE_ACTION_BITS[label], np.uint16(0)).astype(np.uint16)
+    return labels
 
-    return pd.concat([
-        ball_wins, tk, tk_u, intc, br, cl, fl, ar, ar_u, 
-        pass_bl, shot_bl, drb_pst, drb_tkl, errors
-    ], ignore_index=True)
+def get_defensive_action_df(df):
+    """Extract defensive actions from match data: each event once, with its category bits in 'da_labels'"""
+    labels = defensive_action_labels(df)
+    mask = labels != 0
+    return df.loc[mask].assign(da_labels=labels[mask]).reset_index(drop=True)
 
 def get_da_count_df(team_name, defensive_actions_df, players_df):
     """Calculate defensive action locations and counts by player"""
     defensive_actions_df = defensive_actions_df[defensive_actions_df['team_name'] == team_name]
-    # Add column with first eleven players only
-    defensive_actions_df = defensive_actions_df.merge(players_df[['player_id', "isFirstEleven"]], on='player_id', how='left')
-    
-    # Calculate mean positions for players
+
+    # Median positions and number of defensive events per player
     average_locs_and_count_df = (defensive_actions_df.groupby('player_id').agg({'x': ['median'], 'y': ['median', 'count']}))
     average_locs_and_count_df.columns = ['x', 'y', 'count']
     average_locs_and_count_df = average_locs_and_count_df.merge(
@@ -860,7 +825,14 @@ def plot_shotmap(ax,df,hteamName,ateamName):
         'xG_per_Shot': axGpSh,
         'Average_Shot_Distance': away_average_shot_distance
     }
-    
+
+    # Freeze-frame context: defenders between shooter and goal, closest defender
+    if 'shot_freeze_frame' in Shotsdf.columns:
+        for data, team_shots in ((home_data, hShotsdf), (away_data, aShotsdf)):
+            context = summarize_shot_context(shot_context(team_shots))
+            data['Avg_Defenders_In_Cone'] = context.get('avg_defenders_in_cone')
+            data['Avg_Nearest_Defender_Distance'] = context.get('avg_nearest_defender')
+
     return [home_data, away_data]
 
 def match_stat(df,hteamName,ateamName):